@@ -10,6 +10,8 @@ Générateur 'verset par verset' enrichi MASSIVEMENT
 from typing import Dict, List, Tuple, Optional
 import re
 
+from versification import osis_for_name, verse_count
+
 # =====================================================================
 # 1) BASE DE DONNÉES ENRICHIE MASSIVEMENT - Couvre les 66 livres
 # =====================================================================
@@ -651,7 +653,7 @@ def build_verse_by_verse_study(
     chapter_map = VERSE_BY_VERSE_LIBRARY.get(book, {}).get(chapter, {})
     # si base absente, squelette générique enrichi
     if not chapter_map:
-        total = 30
+        total = verse_count(osis_for_name(book) or "", chapter) or 30
         v_start = only_verse or start_verse or 1
         v_end = v_start if only_verse else min(total, v_start + (batch_size or total) - 1)
 
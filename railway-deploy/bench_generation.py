@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Banc d'essai des chemins de génération (débit, latences p50/p95/p99).
+
+Usage :
+    python bench_generation.py --requests 200 --concurrency 20
+    python bench_generation.py --route /api/generate-study-gemini --passages "Jean 3" "Romains 8"
+    python bench_generation.py --url http://localhost:8000     # serveur déjà lancé
+
+Sans --url, l'application est chargée dans ce processus avec le LLM simulé (LLM_FAKE=1, voir
+fake_llm.py) : aucun appel Gemini payant. Le texte biblique vient du corpus local s'il a été
+ingéré (ingest_darby.py), sinon d'api.bible (puis de son cache).
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import List
+
+import httpx
+
+
+async def run(url: str, route: str, passages: List[str], requests: int, concurrency: int, app=None) -> int:
+    from resilience import LatencyTracker
+
+    latencies = LatencyTracker(window=max(1, requests))
+    errors = 0
+    slots = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app) if app is not None else None
+
+    async with httpx.AsyncClient(base_url=url, transport=transport, timeout=600.0) as client:
+        async def one(i: int) -> None:
+            nonlocal errors
+            async with slots:
+                started = time.perf_counter()
+                try:
+                    resp = await client.post(route, json={"passage": passages[i % len(passages)]})
+                    resp.raise_for_status()
+                except httpx.HTTPError as e:
+                    errors += 1
+                    print(f"⚠️ #{i}: {e}")
+                    return
+                latencies.record(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[one(i) for i in range(requests)])
+        elapsed = time.perf_counter() - started
+        metrics = (await client.get("/api/metrics")).json()
+
+    stats = latencies.stats()
+    print(f"📊 {route} — {requests} requêtes, concurrence {concurrency}, {elapsed:.2f}s")
+    print(f"   débit : {len(latencies) / elapsed:.2f} req/s, erreurs : {errors}")
+    print(f"   latence : p50 {stats['p50_ms']} ms, p95 {stats['p95_ms']} ms, p99 {stats['p99_ms']} ms")
+    print(f"   llm : {metrics.get('llm')}")
+    if app is not None:
+        import fake_llm
+        print(f"   fake llm : {fake_llm.config.stats()}")
+    return 1 if errors else 0
+
+
+async def run_in_process(args) -> int:
+    os.environ.setdefault("LLM_FAKE", "1")
+    # Mesurer la génération, pas le cache : pas de cache des explications sauf demande explicite
+    os.environ.setdefault("EXPLANATION_CACHE", "0")
+    import server
+
+    async with server.lifespan(server.app):
+        return await run("http://bench", args.route, args.passages, args.requests, args.concurrency, app=server.app)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Mesure débit et latences des routes de génération")
+    parser.add_argument("--url", default=None, help="Serveur à mesurer (défaut : application en processus, LLM simulé)")
+    parser.add_argument("--route", default="/api/generate-verse-by-verse", help="Route POST à appeler")
+    parser.add_argument("--passages", nargs="+", default=["Jean 3", "Genèse 1", "Psaumes 23", "Romains 8"])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.url:
+        return asyncio.run(run(args.url, args.route, args.passages, args.requests, args.concurrency))
+    return asyncio.run(run_in_process(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
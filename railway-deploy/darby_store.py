@@ -0,0 +1,131 @@
+# Corpus biblique local (SQLite) pour servir les versets sans appel réseau
+# Rempli une fois par ingest_darby.py, lu en priorité par fetch_verse_text / fetch_passage_text
+
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "darby.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS verses (
+    bible_id TEXT NOT NULL,
+    book TEXT NOT NULL,
+    chapter INTEGER NOT NULL,
+    verse INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (bible_id, book, chapter, verse)
+) WITHOUT ROWID;
+"""
+
+
+class DarbyStore:
+    """Stockage compact des versets, indexé par (bible_id, livre OSIS, chapitre, verset)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def available(self) -> bool:
+        """Le corpus n'est utilisé que s'il a été ingéré (on ne crée pas de fichier vide au service)"""
+        return self._conn is not None or os.path.exists(self.path)
+
+    def _connect(self, create: bool = False) -> Optional[sqlite3.Connection]:
+        if self._conn is not None:
+            return self._conn
+        if not create and not os.path.exists(self.path):
+            return None
+        with self._lock:
+            if self._conn is None:
+                if create:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                conn = sqlite3.connect(self.path, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                self._conn = conn
+        return self._conn
+
+    # --- Lecture ---
+    def get_verse(self, bible_id: str, book: str, chapter: int, verse: int) -> Optional[str]:
+        conn = self._connect()
+        if conn is None:
+            return None
+        row = conn.execute(
+            "SELECT text FROM verses WHERE bible_id=? AND book=? AND chapter=? AND verse=?",
+            (bible_id, book, chapter, verse),
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def get_chapter(self, bible_id: str, book: str, chapter: int) -> List[Tuple[int, str]]:
+        conn = self._connect()
+        if conn is None:
+            return []
+        rows = conn.execute(
+            "SELECT verse, text FROM verses WHERE bible_id=? AND book=? AND chapter=? ORDER BY verse",
+            (bible_id, book, chapter),
+        ).fetchall()
+        if rows:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return [(int(v), t) for v, t in rows]
+
+    def verse_numbers(self, bible_id: str, book: str, chapter: int) -> List[int]:
+        """Numéros des versets ingérés pour ce chapitre ([] si absent) ; ne compte ni hit ni miss"""
+        conn = self._connect()
+        if conn is None:
+            return []
+        rows = conn.execute(
+            "SELECT verse FROM verses WHERE bible_id=? AND book=? AND chapter=? ORDER BY verse",
+            (bible_id, book, chapter),
+        ).fetchall()
+        return [int(v) for (v,) in rows]
+
+    def stored_chapters(self, bible_id: str) -> Set[Tuple[str, int]]:
+        conn = self._connect()
+        if conn is None:
+            return set()
+        rows = conn.execute("SELECT DISTINCT book, chapter FROM verses WHERE bible_id=?", (bible_id,)).fetchall()
+        return {(b, int(c)) for b, c in rows}
+
+    # --- Écriture (ingestion) ---
+    def put_chapter(self, bible_id: str, book: str, chapter: int, verses: List[Tuple[int, str]]) -> None:
+        conn = self._connect(create=True)
+        with self._lock, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO verses (bible_id, book, chapter, verse, text) VALUES (?, ?, ?, ?, ?)",
+                [(bible_id, book, chapter, num, txt) for num, txt in verses],
+            )
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        info: Dict[str, Any] = {"path": self.path, "available": self.available, "hits": self.hits, "misses": self.misses}
+        conn = self._connect()
+        if conn is not None:
+            info["verses"] = conn.execute("SELECT COUNT(*) FROM verses").fetchone()[0]
+        return info
+
+
+def split_verse_id(verse_id: str) -> Optional[Tuple[str, int, int]]:
+    """'GEN.1.3' -> ('GEN', 1, 3) ; None si l'identifiant n'est pas un verset simple"""
+    parts = verse_id.split(".")
+    if len(parts) != 3 or not parts[1].isdigit() or not parts[2].isdigit():
+        return None
+    return parts[0], int(parts[1]), int(parts[2])
+
+
+# Instance globale du corpus local
+darby_store = DarbyStore(os.getenv("DARBY_STORE_PATH", DEFAULT_STORE_PATH))
@@ -0,0 +1,163 @@
+# Cache persistant (SQLite) des contenus générés par le LLM
+# Clé = (livre, chapitre, verset, modèle, empreinte du gabarit de prompt) : une même demande
+# avec le même modèle et le même prompt ne repasse jamais par le LLM.
+# Taille bornée en octets ; éviction des entrées les moins récemment lues.
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+DEFAULT_EXPLANATION_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "explanations.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS explanations (
+    book TEXT NOT NULL,
+    chapter INTEGER NOT NULL,
+    verse INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    template TEXT NOT NULL,
+    content TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (book, chapter, verse, model, template)
+);
+CREATE INDEX IF NOT EXISTS explanations_accessed ON explanations (accessed_at);
+CREATE INDEX IF NOT EXISTS explanations_model ON explanations (model);
+"""
+
+
+def template_hash(*parts: str) -> str:
+    """Empreinte courte d'un gabarit de prompt (message système + gabarit)"""
+    digest = hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+    return digest[:16]
+
+
+class ExplanationCache:
+    """Contenus générés, adressés par passage + modèle + gabarit"""
+
+    def __init__(self, path: Optional[str], max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._bytes: Optional[int] = None
+
+        # Compteurs
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "ExplanationCache":
+        enabled = os.getenv("EXPLANATION_CACHE", "1") not in ("0", "false", "False")
+        return cls(
+            path=os.getenv("EXPLANATION_CACHE_PATH", DEFAULT_EXPLANATION_CACHE_PATH) if enabled else None,
+            max_bytes=int(os.getenv("EXPLANATION_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+        )
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if self.path is None:
+            return None
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                    conn = sqlite3.connect(self.path, check_same_thread=False)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.executescript(_SCHEMA)
+                    self._bytes = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM explanations").fetchone()[0]
+                    self._conn = conn
+        return self._conn
+
+    def get(self, book: str, chapter: int, verse: int, model: str, templates: Iterable[str]) -> Optional[str]:
+        """Premier contenu trouvé parmi les gabarits acceptés (ordre de préférence)"""
+        db = self._db()
+        if db is None:
+            return None
+        for template in templates:
+            row = db.execute(
+                "SELECT content FROM explanations WHERE book=? AND chapter=? AND verse=? AND model=? AND template=?",
+                (book, chapter, verse, model, template),
+            ).fetchone()
+            if row is not None:
+                with self._lock, db:
+                    db.execute(
+                        "UPDATE explanations SET accessed_at=? WHERE book=? AND chapter=? AND verse=? AND model=? AND template=?",
+                        (time.time(), book, chapter, verse, model, template),
+                    )
+                self.hits += 1
+                return row[0]
+        self.misses += 1
+        return None
+
+    def put(self, book: str, chapter: int, verse: int, model: str, template: str, content: str) -> None:
+        db = self._db()
+        if db is None:
+            return
+        size = len(content.encode("utf-8"))
+        now = time.time()
+        with self._lock, db:
+            old = db.execute(
+                "SELECT bytes FROM explanations WHERE book=? AND chapter=? AND verse=? AND model=? AND template=?",
+                (book, chapter, verse, model, template),
+            ).fetchone()
+            db.execute(
+                "INSERT OR REPLACE INTO explanations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (book, chapter, verse, model, template, content, size, now, now),
+            )
+            self._bytes += size - (old[0] if old else 0)
+            self.stores += 1
+            self._evict(db)
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        """Supprime les entrées les moins récemment lues jusqu'à repasser sous 90 % du plafond"""
+        if self._bytes <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        rows = db.execute("SELECT rowid, bytes FROM explanations ORDER BY accessed_at").fetchall()
+        doomed = []
+        for rowid, size in rows:
+            if self._bytes <= target:
+                break
+            doomed.append((rowid,))
+            self._bytes -= size
+        db.executemany("DELETE FROM explanations WHERE rowid=?", doomed)
+        self.evictions += len(doomed)
+
+    def purge(self, book: Optional[str] = None, chapter: Optional[int] = None,
+              verse: Optional[int] = None, model: Optional[str] = None) -> int:
+        """Supprime les entrées d'un passage (livre, chapitre, verset) et/ou d'un modèle"""
+        db = self._db()
+        if db is None:
+            return 0
+        clauses, args = [], []
+        for column, value in (("book", book), ("chapter", chapter), ("verse", verse), ("model", model)):
+            if value is not None:
+                clauses.append(f"{column}=?")
+                args.append(value)
+        if not clauses:
+            raise ValueError("purge: préciser au moins un passage ou un modèle")
+        where = " AND ".join(clauses)
+        with self._lock, db:
+            freed = db.execute(f"SELECT COALESCE(SUM(bytes), 0) FROM explanations WHERE {where}", args).fetchone()[0]
+            deleted = db.execute(f"DELETE FROM explanations WHERE {where}", args).rowcount
+            self._bytes -= freed
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        info: Dict[str, Any] = {"path": self.path, "max_bytes": self.max_bytes, "hits": self.hits,
+                                "misses": self.misses, "stores": self.stores, "evictions": self.evictions}
+        db = self._db()
+        if db is not None:
+            info["entries"] = db.execute("SELECT COUNT(*) FROM explanations").fetchone()[0]
+            info["bytes"] = self._bytes
+        return info
+
+
+# Instance globale du cache des explications générées
+explanation_cache = ExplanationCache.from_env()
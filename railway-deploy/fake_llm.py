@@ -0,0 +1,151 @@
+# Stand-in local de l'interface emergentintegrations (LlmChat / UserMessage)
+# Pour mesurer débit et latences de queue des chemins Gemini sans coût ni réseau :
+#   LLM_FAKE=1 uvicorn server:app
+# Texte français déterministe (fonction du prompt), latence tirée d'une loi log-normale avec
+# une queue lente optionnelle, erreurs injectées (dont les SSL/EOF traitées à part par server.py),
+# et réponse en flux via stream_message().
+#
+# Réglages (variables d'environnement) :
+#   FAKE_LLM_LATENCY_MS      latence médiane avant le premier morceau (défaut 800)
+#   FAKE_LLM_LATENCY_SIGMA   dispersion log-normale (défaut 0.5 ; 0 = latence fixe)
+#   FAKE_LLM_TAIL_RATE       proportion d'appels très lents (défaut 0.01)
+#   FAKE_LLM_TAIL_FACTOR     multiplicateur de latence de ces appels (défaut 10)
+#   FAKE_LLM_TOKENS_PER_SEC  débit de génération après le premier morceau (défaut 80 ; 0 = instantané)
+#   FAKE_LLM_ERROR_RATE      proportion d'erreurs génériques (défaut 0)
+#   FAKE_LLM_SSL_ERROR_RATE  proportion d'erreurs SSL/EOF (défaut 0)
+#   FAKE_LLM_SEED            graine du tirage latence/erreurs (défaut : non déterministe)
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import ssl
+from typing import AsyncIterator, Dict, List, Optional
+
+_SENTENCES = [
+    "Ce verset révèle la fidélité de Dieu envers son peuple au cœur même de l'épreuve.",
+    "Le texte souligne la souveraineté divine qui conduit l'histoire vers son accomplissement.",
+    "On y discerne la grâce qui précède toute réponse humaine et l'appelle à la foi.",
+    "L'auteur inspiré met en lumière la sainteté de Dieu et l'appel à marcher devant lui.",
+    "Ce passage annonce en figure l'œuvre rédemptrice accomplie en Jésus-Christ.",
+    "La parole de Dieu y apparaît comme créatrice, efficace et digne de confiance.",
+    "Le contexte du chapitre éclaire la portée de cette déclaration pour les premiers lecteurs.",
+    "Le croyant est invité à l'obéissance confiante plutôt qu'à la crainte.",
+    "La promesse faite ici s'inscrit dans l'alliance que Dieu renouvelle de génération en génération.",
+    "Le vocabulaire employé rappelle d'autres textes de l'Écriture et en approfondit le sens.",
+    "Cette vérité nourrit la prière, l'espérance et la vie communautaire de l'Église.",
+    "L'application pratique appelle à l'humilité, à la reconnaissance et au service.",
+]
+
+
+class FakeLlmError(RuntimeError):
+    """Erreur générique simulée du fournisseur"""
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+class FakeLlmConfig:
+    """Paramètres de simulation, lus une fois depuis l'environnement (modifiables en test)"""
+
+    def __init__(self):
+        self.latency_ms = _env_float("FAKE_LLM_LATENCY_MS", 800)
+        self.sigma = _env_float("FAKE_LLM_LATENCY_SIGMA", 0.5)
+        self.tail_rate = _env_float("FAKE_LLM_TAIL_RATE", 0.01)
+        self.tail_factor = _env_float("FAKE_LLM_TAIL_FACTOR", 10)
+        self.tokens_per_sec = _env_float("FAKE_LLM_TOKENS_PER_SEC", 80)
+        self.error_rate = _env_float("FAKE_LLM_ERROR_RATE", 0)
+        self.ssl_error_rate = _env_float("FAKE_LLM_SSL_ERROR_RATE", 0)
+        seed = os.getenv("FAKE_LLM_SEED")
+        self.rng = random.Random(int(seed) if seed else None)
+
+        # Compteurs
+        self.calls = 0
+        self.errors = 0
+        self.ssl_errors = 0
+
+    def first_token_delay(self) -> float:
+        delay = self.latency_ms / 1000.0
+        if self.sigma > 0:
+            delay *= self.rng.lognormvariate(0.0, self.sigma)
+        if self.rng.random() < self.tail_rate:
+            delay *= self.tail_factor
+        return delay
+
+    def maybe_fail(self) -> None:
+        draw = self.rng.random()
+        if draw < self.ssl_error_rate:
+            self.ssl_errors += 1
+            raise ssl.SSLEOFError(8, "EOF occurred in violation of protocol (_ssl.c:2427)")
+        if draw < self.ssl_error_rate + self.error_rate:
+            self.errors += 1
+            raise FakeLlmError("Fake LLM: 503 Service Unavailable")
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "errors": self.errors, "ssl_errors": self.ssl_errors}
+
+
+config = FakeLlmConfig()
+
+
+def _sentences(seed: str, count: int) -> str:
+    digest = hashlib.sha256(seed.encode("utf-8")).digest()
+    return " ".join(_SENTENCES[digest[i % len(digest)] % len(_SENTENCES)] for i in range(count))
+
+
+def fake_reply(prompt: str) -> str:
+    """Réponse déterministe adaptée à la forme du prompt (lot JSON, 28 rubriques, verset, autre)"""
+    if "tableau JSON" in prompt:
+        numbers = [int(n) for n in re.findall(r"^(\d+)\. ", prompt, re.M)]
+        items = [{"verse": n, "explanation": _sentences(f"{prompt}|{n}", 3)} for n in numbers]
+        return json.dumps(items, ensure_ascii=False)
+    headings = re.findall(r"^## \d+\. .+$", prompt, re.M)
+    if headings:
+        return "\n\n".join(f"{h}\n\n{_sentences(prompt + h, 4)}" for h in headings)
+    verses = re.findall(r"^\*\*VERSET (\d+)\*\*", prompt, re.M)
+    if verses:
+        return "\n\n".join(f"**VERSET {v}**\n\n{_sentences(prompt + v, 5)}" for v in verses)
+    return _sentences(prompt, 5)
+
+
+class UserMessage:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class LlmChat:
+    """Même interface que emergentintegrations.llm.chat.LlmChat (sous-ensemble utilisé par server.py)"""
+
+    def __init__(self, api_key: Optional[str], session_id: str, system_message: str):
+        self.api_key = api_key
+        self.session_id = session_id
+        self.system_message = system_message
+        self.messages: List[Dict[str, str]] = [{"role": "system", "content": system_message}]
+        self.provider: Optional[str] = None
+        self.model: Optional[str] = None
+
+    def with_model(self, provider: str, model: str) -> "LlmChat":
+        self.provider, self.model = provider, model
+        return self
+
+    async def stream_message(self, message: UserMessage) -> AsyncIterator[str]:
+        config.calls += 1
+        self.messages.append({"role": "user", "content": message.text})
+        await asyncio.sleep(config.first_token_delay())
+        config.maybe_fail()
+        reply = fake_reply(message.text)
+        # Morceaux de ~4 mots ; ~1,3 jeton par mot
+        words = reply.split(" ")
+        step = 4
+        pause = (step * 1.3 / config.tokens_per_sec) if config.tokens_per_sec > 0 else 0.0
+        for i in range(0, len(words), step):
+            if i:
+                await asyncio.sleep(pause)
+            yield " ".join(words[i:i + step]) + (" " if i + step < len(words) else "")
+        self.messages.append({"role": "assistant", "content": reply})
+
+    async def send_message(self, message: UserMessage) -> str:
+        return "".join([chunk async for chunk in self.stream_message(message)])
@@ -0,0 +1,215 @@
+# Moteur de règles des explications de repli (sans LLM)
+# Les règles vivent dans des fichiers JSON (data/fallback_rules/*.json), plus dans le code : chacune a une
+# portée (livre OSIS, chapitre, plage de versets) et une condition facultative sur des mots-clés.
+# Tous les mots-clés de toutes les règles forment un seul automate Aho-Corasick : le texte d'un verset
+# est parcouru une fois, quel que soit le nombre de règles, puis seules les règles de sa portée sont
+# évaluées sur l'ensemble des mots-clés trouvés.
+#
+# Format d'un fichier :
+#   {"rules": [
+#     {"book": "GEN", "chapter": 1, "verses": [2, 3], "text": "..."},
+#     {"book": "GEN", "chapter": 6, "when": [["noé", "grâce"], ["juste"]], "text": "..."},
+#     {"book": "GEN", "text": "Ce passage de {book} {chapter} ..."},
+#     {"text": "Règle par défaut"}
+#   ]}
+# - "verses" : [premier, dernier] inclus, dernier null = jusqu'à la fin du chapitre
+# - "when" : OU de ET de mots-clés, cherchés comme sous-chaînes du verset en minuscules
+# - "text" : gabarit, variables {book} (nom tel que demandé), {chapter}, {verse}
+# Première règle applicable : portée la plus précise d'abord (chapitre, puis livre, puis défaut),
+# puis ordre des fichiers (tri par nom) et ordre dans le fichier.
+
+import glob
+import json
+import os
+from bisect import bisect_left
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+DEFAULT_RULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "fallback_rules")
+# Séparateur des versets d'un chapitre parcouru d'un bloc ; interdit dans les mots-clés
+_VERSE_SEPARATOR = "\x00"
+
+
+class KeywordAutomaton:
+    """Automate Aho-Corasick : toutes les occurrences de tous les mots-clés en un seul parcours"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Mots-clés se terminant sur chaque nœud ; _out y ajoute ceux des liens d'échec (build)
+        self._own: List[Tuple[int, ...]] = [()]
+        self._out: List[Tuple[int, ...]] = [()]
+        self._ids: Dict[str, int] = {}
+        self._built = True
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, keyword: str) -> int:
+        """Identifiant du mot-clé (le même pour un mot-clé déjà ajouté)"""
+        if keyword in self._ids:
+            return self._ids[keyword]
+        kid = len(self._ids)
+        self._ids[keyword] = kid
+        node = 0
+        for ch in keyword:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._own.append(())
+                self._out.append(())
+            node = nxt
+        self._own[node] += (kid,)
+        self._built = False
+        return kid
+
+    def build(self) -> None:
+        """Liens d'échec en largeur ; les sorties d'un nœud incluent celles de son lien d'échec"""
+        # Reconstruit à partir des mots-clés propres : appeler build() plusieurs fois ne duplique rien
+        self._out = list(self._own)
+        queue = list(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+        for node in queue:
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] += self._out[self._fail[child]]
+        self._built = True
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """(position de fin exclue, identifiant) de chaque occurrence"""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for pos, ch in enumerate(text, 1):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for kid in out[node]:
+                yield pos, kid
+
+    def find(self, text: str) -> Set[int]:
+        """Identifiants des mots-clés présents dans le texte"""
+        return {kid for _, kid in self.iter_matches(text)}
+
+
+class FallbackRule:
+    __slots__ = ("book", "chapter", "first", "last", "when", "text", "source")
+
+    def __init__(self, book: Optional[str], chapter: Optional[int], first: int, last: Optional[int],
+                 when: Tuple[FrozenSet[int], ...], text: str, source: str):
+        self.book = book
+        self.chapter = chapter
+        self.first = first
+        self.last = last
+        self.when = when
+        self.text = text
+        self.source = source
+
+    def applies(self, verse: int, found: Set[int]) -> bool:
+        if verse < self.first or (self.last is not None and verse > self.last):
+            return False
+        return not self.when or any(terms <= found for terms in self.when)
+
+
+class FallbackRuleEngine:
+    """Règles indexées par (livre, chapitre) ; mots-clés partagés dans un seul automate"""
+
+    def __init__(self, rules: Iterable[Dict[str, Any]] = ()):
+        self.automaton = KeywordAutomaton()
+        self._by_scope: Dict[Tuple[Optional[str], Optional[int]], List[FallbackRule]] = {}
+        self.sources: List[str] = []
+        self.rule_count = 0
+        self.add_rules(rules)
+
+    @classmethod
+    def load_dir(cls, path: str = DEFAULT_RULES_DIR) -> "FallbackRuleEngine":
+        engine = cls()
+        for file_path in sorted(glob.glob(os.path.join(path, "*.json"))):
+            with open(file_path, encoding="utf-8") as f:
+                data = json.load(f)
+            engine.add_rules(data.get("rules", []), source=os.path.basename(file_path))
+        return engine
+
+    def add_rules(self, rules: Iterable[Dict[str, Any]], source: str = "") -> None:
+        for raw in rules:
+            if "text" not in raw:
+                raise ValueError(f"Règle sans 'text' ({source}): {raw}")
+            if raw.get("chapter") is not None and raw.get("book") is None:
+                raise ValueError(f"Règle avec 'chapter' sans 'book' ({source}): {raw}")
+            first, last = raw.get("verses") or (1, None)
+            if any(_VERSE_SEPARATOR in keyword for terms in raw.get("when") or () for keyword in terms):
+                raise ValueError(f"Mot-clé invalide ({source}): {raw}")
+            when = tuple(
+                frozenset(self.automaton.add(keyword.lower()) for keyword in terms)
+                for terms in raw.get("when") or ()
+            )
+            rule = FallbackRule(raw.get("book"), raw.get("chapter"), first, last, when, raw["text"], source)
+            self._by_scope.setdefault((rule.book, rule.chapter), []).append(rule)
+            self.rule_count += 1
+        if source and source not in self.sources:
+            self.sources.append(source)
+        self.automaton.build()
+
+    def candidates(self, book: str, chapter: int) -> Iterator[FallbackRule]:
+        """Règles de la portée, de la plus précise à la plus générale"""
+        for scope in ((book, chapter), (book, None), (None, None)):
+            yield from self._by_scope.get(scope, ())
+
+    def match(self, found: Set[int], book: str, chapter: int, verse: int) -> Optional[FallbackRule]:
+        for rule in self.candidates(book, chapter):
+            if rule.applies(verse, found):
+                return rule
+        return None
+
+    def explain(self, text: str, book: str, chapter: int, verse: int, book_label: Optional[str] = None) -> Optional[str]:
+        """Texte de la première règle applicable au verset, None si aucune"""
+        rule = self.match(self.automaton.find(text.lower()), book, chapter, verse)
+        if rule is None:
+            return None
+        return rule.text.format(book=book_label or book, chapter=chapter, verse=verse)
+
+    def explain_chapter(self, verses: Sequence[Tuple[int, str]], book: str, chapter: int,
+                        book_label: Optional[str] = None) -> Dict[int, Optional[str]]:
+        """
+        explain() pour tous les versets d'un chapitre en un seul passage de l'automate :
+        le chapitre est mis en minuscules et parcouru d'un bloc, versets séparés par un caractère
+        absent des mots-clés (aucune occurrence ne chevauche deux versets) ; chaque occurrence est
+        rattachée à son verset par sa position.
+        """
+        if not verses:
+            return {}
+        text = _VERSE_SEPARATOR.join(txt.replace(_VERSE_SEPARATOR, " ") for _, txt in verses).lower()
+        # Position de chaque séparateur (après minuscules : la longueur d'un verset peut changer)
+        separators: List[int] = []
+        pos = text.find(_VERSE_SEPARATOR)
+        while pos != -1:
+            separators.append(pos)
+            pos = text.find(_VERSE_SEPARATOR, pos + 1)
+
+        found: List[Set[int]] = [set() for _ in verses]
+        for end, kid in self.automaton.iter_matches(text):
+            found[bisect_left(separators, end - 1)].add(kid)
+
+        candidates = list(self.candidates(book, chapter))
+        label = book_label or book
+        result: Dict[int, Optional[str]] = {}
+        for (num, _), keywords in zip(verses, found):
+            rule = next((r for r in candidates if r.applies(num, keywords)), None)
+            result[num] = rule.text.format(book=label, chapter=chapter, verse=num) if rule is not None else None
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {"rules": self.rule_count, "keywords": len(self.automaton), "scopes": len(self._by_scope),
+                "sources": self.sources}
+
+
+# Règles de repli chargées au démarrage
+fallback_rules = FallbackRuleEngine.load_dir(os.getenv("FALLBACK_RULES_DIR", DEFAULT_RULES_DIR))
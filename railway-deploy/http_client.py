@@ -0,0 +1,177 @@
+# Client HTTP mutualisé pour api.bible et les routes proxy
+# Un seul httpx.AsyncClient par application : keep-alive, HTTP/2, limites de pool,
+# plafond de connexions par hôte et compteurs d'utilisation du pool.
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+# HTTP/2 nécessite le paquet optionnel "h2" (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class PooledHttpClient:
+    """Client httpx partagé, ouvert et fermé par le lifespan FastAPI"""
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        max_per_host: int = 20,
+        http2: bool = True,
+        timeout: float = 30.0,
+    ):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.max_per_host = max_per_host
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+        # Compteurs d'utilisation
+        self.requests_total = 0
+        self.errors_total = 0
+        self.connections_opened = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.waiting = 0
+        self.peak_waiting = 0
+        self.wait_seconds_total = 0.0
+        self.host_in_flight: Dict[str, int] = {}
+
+    @classmethod
+    def from_env(cls) -> "PooledHttpClient":
+        """Construit le client à partir des variables d'environnement"""
+        return cls(
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+            max_per_host=int(os.getenv("HTTP_MAX_PER_HOST", "20")),
+            http2=os.getenv("HTTP2_ENABLED", "1") not in ("0", "false", "False"),
+            timeout=float(os.getenv("HTTP_TIMEOUT", "30")),
+        )
+
+    # --- Cycle de vie ---
+    async def start(self) -> None:
+        if self._client is not None:
+            return
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        self._client = httpx.AsyncClient(limits=limits, http2=self.http2, timeout=self.timeout)
+        print(f"✅ HTTP pool ready (http2={self.http2}, max={self.max_connections}, per_host={self.max_per_host})")
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._host_slots.clear()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("PooledHttpClient non démarré (appeler start() dans le lifespan)")
+        return self._client
+
+    # --- Requêtes ---
+    async def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        # Appelé par httpcore : on compte les nouvelles connexions TCP pour mesurer la réutilisation
+        if event_name == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        if self._client is None:
+            # Usage hors lifespan (scripts, CLI) : ouverture paresseuse
+            await self.start()
+
+        host = urlsplit(url).netloc
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.max_per_host)
+
+        extensions = dict(kwargs.pop("extensions", None) or {})
+        extensions.setdefault("trace", self._trace)
+
+        self.waiting += 1
+        self.peak_waiting = max(self.peak_waiting, self.waiting)
+        started = time.perf_counter()
+        try:
+            await slot.acquire()
+        finally:
+            self.waiting -= 1
+        self.wait_seconds_total += time.perf_counter() - started
+
+        self.requests_total += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        self.host_in_flight[host] = self.host_in_flight.get(host, 0) + 1
+        try:
+            return await self.client.request(method, url, extensions=extensions, **kwargs)
+        except httpx.HTTPError:
+            self.errors_total += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.host_in_flight[host] -= 1
+            slot.release()
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    # --- Métriques ---
+    def _pool_connections(self) -> Dict[str, int]:
+        """Inspecte le pool httpcore sous-jacent (meilleur effort)"""
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = getattr(pool, "connections", None) or []
+        idle = 0
+        for conn in connections:
+            try:
+                if conn.is_idle():
+                    idle += 1
+            except Exception:
+                pass
+        return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
+
+    def stats(self) -> Dict[str, Any]:
+        reused = max(self.requests_total - self.connections_opened, 0)
+        return {
+            "started": self._client is not None,
+            "http2": self.http2,
+            "limits": {
+                "max_connections": self.max_connections,
+                "max_keepalive_connections": self.max_keepalive_connections,
+                "keepalive_expiry": self.keepalive_expiry,
+                "max_per_host": self.max_per_host,
+            },
+            "requests_total": self.requests_total,
+            "errors_total": self.errors_total,
+            "connections_opened": self.connections_opened,
+            "connection_reuse_ratio": round(reused / self.requests_total, 3) if self.requests_total else 0.0,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "waiting": self.waiting,
+            "peak_waiting": self.peak_waiting,
+            "avg_wait_ms": round(1000 * self.wait_seconds_total / self.requests_total, 3) if self.requests_total else 0.0,
+            "host_in_flight": {h: n for h, n in self.host_in_flight.items() if n},
+            "pool": self._pool_connections() if self._client is not None else {"open": 0, "idle": 0, "active": 0},
+        }
+
+
+# Instance globale partagée par toute l'application
+http_pool = PooledHttpClient.from_env()
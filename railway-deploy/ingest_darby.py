@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Ingestion du corpus Darby (ou de BIBLE_ID) dans le stockage local SQLite.
+
+Usage :
+    python ingest_darby.py                    # Bible configurée (BIBLE_ID), tous les livres
+    python ingest_darby.py --books GEN JHN    # seulement certains livres
+    python ingest_darby.py --db /chemin/darby.sqlite
+
+Les chapitres déjà présents sont ignorés : la commande peut être relancée après une coupure.
+"""
+
+import argparse
+import asyncio
+import sys
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from darby_store import DarbyStore, darby_store
+from http_client import http_pool
+from server import (
+    PREFERRED_BIBLE_ID,
+    _fetch_passage_per_verse,
+    api_bible_get,
+    fetch_chapter_verses,
+)
+
+
+async def list_book_chapters(bible_id: str) -> List[Tuple[str, int]]:
+    """Liste (livre OSIS, chapitre) de toute la Bible via /books?include-chapters=true"""
+    data = await api_bible_get(f"/bibles/{bible_id}/books", "books", {"include-chapters": "true"})
+    chapters: List[Tuple[str, int]] = []
+    for book in data.get("data", []):
+        for chap in book.get("chapters") or []:
+            number = str(chap.get("number", ""))
+            if number.isdigit():
+                chapters.append((book["id"], int(number)))
+    return chapters
+
+
+async def ingest(bible_id: str, store: DarbyStore, books: Optional[List[str]] = None) -> int:
+    await http_pool.start()
+    try:
+        chapters = await list_book_chapters(bible_id)
+        if books:
+            wanted = {b.upper() for b in books}
+            chapters = [c for c in chapters if c[0] in wanted]
+        done = store.stored_chapters(bible_id)
+        todo = [c for c in chapters if c not in done]
+        print(f"📖 {bible_id}: {len(chapters)} chapitres, {len(done)} déjà stockés, {len(todo)} à télécharger")
+
+        total_verses = 0
+        for idx, (book, chapter) in enumerate(todo, start=1):
+            try:
+                verses = await fetch_chapter_verses(bible_id, book, chapter)
+            except HTTPException as e:
+                print(f"⚠️ {book}.{chapter}: {e.detail}, per-verse fallback")
+                verses = []
+            if not verses:
+                verses = await _fetch_passage_per_verse(bible_id, book, chapter)
+            store.put_chapter(bible_id, book, chapter, verses)
+            total_verses += len(verses)
+            print(f"✅ [{idx}/{len(todo)}] {book}.{chapter}: {len(verses)} versets")
+        return total_verses
+    finally:
+        await http_pool.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Télécharge la Bible configurée dans le corpus local SQLite")
+    parser.add_argument("--bible-id", default=PREFERRED_BIBLE_ID, help="Identifiant api.bible (défaut: BIBLE_ID)")
+    parser.add_argument("--db", default=None, help="Chemin du fichier SQLite (défaut: DARBY_STORE_PATH)")
+    parser.add_argument("--books", nargs="*", help="Codes OSIS à ingérer (défaut: tous)")
+    args = parser.parse_args()
+
+    store = DarbyStore(args.db) if args.db else darby_store
+    try:
+        count = asyncio.run(ingest(args.bible_id, store, args.books))
+    except HTTPException as e:
+        print(f"❌ Ingestion interrompue: {e.detail}")
+        return 1
+    finally:
+        store.close()
+    print(f"🎉 {count} versets ajoutés dans {store.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
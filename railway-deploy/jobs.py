@@ -0,0 +1,266 @@
+# File de travaux de génération asynchrones
+# Une étude de chapitre complète dépasse les timeouts des proxys et du serverless (30 s / 120 s) :
+# POST renvoie tout de suite un identifiant, un pool de workers exécute le travail, et le client
+# interroge le statut (progression, contenu partiel puis final).
+# - déduplication : une requête identique en cours ou terminée renvoie le même travail
+# - concurrence bornée (workers) et file d'attente bornée
+# - résultats conservés `ttl` secondes après la fin
+# - persistance optionnelle (SQLite) : les travaux non terminés reprennent au redémarrage
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_JOBS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "jobs.sqlite")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    """Trop de travaux en attente"""
+
+
+@dataclass
+class Job:
+    """Un travail de génération et son état observable"""
+    id: str
+    key: str
+    kind: str
+    payload: Dict[str, Any]
+    status: str = QUEUED
+    done: int = 0
+    total: int = 0
+    content: str = ""
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def report(self, done: Optional[int] = None, total: Optional[int] = None, content: Optional[str] = None) -> None:
+        """Appelé par le runner : progression et/ou contenu partiel (persistés aux changements d'état seulement)"""
+        if done is not None:
+            self.done = done
+        if total is not None:
+            self.total = total
+        if content is not None:
+            self.content = content
+        self.updated_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": {"done": self.done, "total": self.total},
+            "content": self.content,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "finished_at": self.finished_at,
+        }
+
+
+Runner = Callable[[Job], Awaitable[str]]
+
+
+def job_key(kind: str, payload: Dict[str, Any]) -> str:
+    """Empreinte de la requête (type + paramètres) pour la déduplication"""
+    raw = json.dumps({"kind": kind, "payload": payload}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SqliteJobStore:
+    """Persistance locale des travaux (un enregistrement par travail, réécrit à chaque changement)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        self._lock = threading.Lock()
+
+    def save(self, job: Job) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO jobs VALUES (?, ?)", (job.id, json.dumps(asdict(job), ensure_ascii=False)))
+
+    def delete(self, job_ids: List[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM jobs WHERE id=?", [(i,) for i in job_ids])
+
+    def load_all(self) -> List[Job]:
+        return [Job(**json.loads(data)) for (data,) in self._conn.execute("SELECT data FROM jobs")]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class JobQueue:
+    """Pool de workers asyncio servant une file de travaux typés (un runner par type)"""
+
+    def __init__(self, workers: int = 2, max_queue: int = 100, ttl: float = 3600.0,
+                 store: Optional[SqliteJobStore] = None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.ttl = ttl
+        self.store = store
+        self._runners: Dict[str, Runner] = {}
+        self._jobs: Dict[str, Job] = {}
+        self._by_key: Dict[str, str] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+        # Compteurs
+        self.submitted = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.expired = 0
+
+    def register(self, kind: str, runner: Runner) -> None:
+        self._runners[kind] = runner
+
+    @property
+    def kinds(self) -> List[str]:
+        return sorted(self._runners)
+
+    # --- Cycle de vie ---
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        if self.store is not None:
+            self._restore()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(max(1, self.workers))]
+        self._tasks.append(asyncio.create_task(self._janitor()))
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def _restore(self) -> None:
+        """Recharge les travaux persistés ; ceux interrompus par l'arrêt repartent du début"""
+        for job in sorted(self.store.load_all(), key=lambda j: j.created_at):
+            if job.status in (QUEUED, RUNNING):
+                job.status = QUEUED
+                job.done, job.content = 0, ""
+                self._queue.put_nowait(job.id)
+            self._jobs[job.id] = job
+            self._by_key[job.key] = job.id
+        self._purge_expired()
+
+    # --- API ---
+    def submit(self, kind: str, payload: Dict[str, Any]) -> Tuple[Job, bool]:
+        """(travail, créé) ; un travail identique en cours ou terminé (non échoué) est réutilisé"""
+        if kind not in self._runners:
+            raise ValueError(f"Type de travail inconnu: {kind}")
+        if self._queue is None:
+            raise RuntimeError("File de travaux non démarrée")
+        self._purge_expired()
+        key = job_key(kind, payload)
+        existing = self._jobs.get(self._by_key.get(key, ""))
+        if existing is not None and existing.status != FAILED:
+            self.deduplicated += 1
+            return existing, False
+        if self._queue.qsize() >= self.max_queue:
+            self.rejected += 1
+            raise JobQueueFull(f"{self._queue.qsize()} travaux en attente")
+
+        job = Job(id=uuid.uuid4().hex, key=key, kind=kind, payload=payload)
+        self._jobs[job.id] = job
+        self._by_key[key] = job.id
+        self._save(job)
+        self._queue.put_nowait(job.id)
+        self.submitted += 1
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is not None and self._is_expired(job, time.time()):
+            self._purge_expired()
+            return None
+        return job
+
+    # --- Exécution ---
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                continue
+            job.status = RUNNING
+            job.report()
+            self._save(job)
+            try:
+                content = await self._runners[job.kind](job)
+                job.status = DONE
+                job.report(content=content)
+                self.completed += 1
+            except asyncio.CancelledError:
+                # Arrêt du service : le travail reste "running" en base et repartira au redémarrage
+                raise
+            except Exception as e:
+                job.status = FAILED
+                job.error = str(e) or e.__class__.__name__
+                job.report()
+                self.failed += 1
+                print(f"❌ Job {job.kind} {job.id} failed: {job.error}")
+            job.finished_at = time.time()
+            self._save(job)
+
+    async def _janitor(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, min(60.0, self.ttl / 2)))
+            self._purge_expired()
+
+    def _is_expired(self, job: Job, now: float) -> bool:
+        return job.finished_at is not None and now - job.finished_at > self.ttl
+
+    def _purge_expired(self) -> None:
+        now = time.time()
+        doomed = [job for job in self._jobs.values() if self._is_expired(job, now)]
+        for job in doomed:
+            del self._jobs[job.id]
+            if self._by_key.get(job.key) == job.id:
+                del self._by_key[job.key]
+        if doomed:
+            self.expired += len(doomed)
+            if self.store is not None:
+                self.store.delete([job.id for job in doomed])
+
+    def _save(self, job: Job) -> None:
+        if self.store is not None:
+            self.store.save(job)
+
+    def stats(self) -> Dict[str, Any]:
+        by_status: Dict[str, int] = {}
+        for job in self._jobs.values():
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+        return {
+            "running": bool(self._tasks),
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "persistent": self.store is not None,
+            "jobs": by_status,
+            "submitted": self.submitted,
+            "deduplicated": self.deduplicated,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "expired": self.expired,
+        }
@@ -0,0 +1,124 @@
+# Réutilisation des sessions LLM (LlmChat) entre appels
+# Construire un client (clé, message système, choix du modèle) à chaque verset coûte du temps et
+# des connexions. Les sessions sont gardées par "portée" (message système + modèle) et prêtées en
+# exclusivité : jamais deux appels concurrents sur la même session.
+# Au retour, chaque session repart d'une conversation vierge pour que l'appel suivant ne voie que son
+# prompt : l'historique exposé (`messages`) est ramené au message système et la session reçoit un
+# nouveau `session_id` (identifiant de conversation du constructeur LlmChat), le client configuré
+# (clé, modèle) restant réutilisé. Un client qui ne permet ni l'un ni l'autre n'est pas remis dans le
+# pool. Une session est recyclée après `max_uses` appels ou une erreur (connexion possiblement cassée).
+
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Hashable, Tuple
+
+SessionFactory = Callable[[str, str], Any]
+
+
+class _Session:
+    __slots__ = ("client", "session_id", "uses", "created_at")
+
+    def __init__(self, client: Any, session_id: str):
+        self.client = client
+        self.session_id = session_id
+        self.uses = 0
+        self.created_at = time.monotonic()
+
+
+def reset_history(client: Any, session_id: str) -> bool:
+    """
+    Repart d'une conversation vierge : historique exposé ramené au(x) message(s) système, nouvel
+    identifiant de conversation. False si le client ne permet ni l'un ni l'autre.
+    """
+    reset = False
+    messages = getattr(client, "messages", None)
+    if isinstance(messages, list):
+        messages[:] = [m for m in messages if isinstance(m, dict) and m.get("role") == "system"]
+        reset = True
+    if isinstance(getattr(client, "session_id", None), str):
+        client.session_id = session_id
+        reset = True
+    return reset
+
+
+class LlmSessionPool:
+    """Sessions LLM inactives par portée, prêtées une à une"""
+
+    def __init__(self, factory: SessionFactory, max_idle: int = 8, max_uses: int = 50, max_age: float = 900.0,
+                 prefix: str = "pool"):
+        self.factory = factory
+        self.max_idle = max_idle
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.prefix = prefix
+        self._idle: Dict[Hashable, Deque[_Session]] = {}
+        self._ids = itertools.count(1)
+        self.in_use = 0
+
+        # Compteurs
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+        self.discarded_errors = 0
+        self.discarded_history = 0
+
+    def _checkout(self, scope: Hashable, system_message: str) -> _Session:
+        idle = self._idle.get(scope)
+        now = time.monotonic()
+        while idle:
+            session = idle.pop()
+            if now - session.created_at <= self.max_age:
+                self.reused += 1
+                return session
+            self.recycled += 1
+        session_id = f"{self.prefix}_{next(self._ids)}"
+        self.created += 1
+        return _Session(self.factory(session_id, system_message), session_id)
+
+    def _checkin(self, scope: Hashable, session: _Session) -> None:
+        session.uses += 1
+        session_id = f"{self.prefix}_{next(self._ids)}"
+        if not reset_history(session.client, session_id):
+            # Historique inaccessible : la réutiliser mêlerait les prompts de requêtes différentes
+            self.discarded_history += 1
+            return
+        session.session_id = session_id
+        if session.uses >= self.max_uses or sum(len(q) for q in self._idle.values()) >= self.max_idle:
+            self.recycled += 1
+            return
+        self._idle.setdefault(scope, deque()).append(session)
+
+    @asynccontextmanager
+    async def session(self, system_message: str, scope: Tuple[Hashable, ...] = ()) -> AsyncIterator[Any]:
+        """Prête une session pour (message système, portée) ; rendue au pool sauf en cas d'erreur"""
+        key = (system_message, *scope)
+        session = self._checkout(key, system_message)
+        self.in_use += 1
+        try:
+            yield session.client
+        except BaseException:
+            self.discarded_errors += 1
+            raise
+        else:
+            self._checkin(key, session)
+        finally:
+            self.in_use -= 1
+
+    def clear(self) -> None:
+        self._idle.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        checkouts = self.created + self.reused
+        return {
+            "idle": sum(len(q) for q in self._idle.values()),
+            "in_use": self.in_use,
+            "scopes": len(self._idle),
+            "created": self.created,
+            "reused": self.reused,
+            "reuse_ratio": round(self.reused / checkouts, 3) if checkouts else 0.0,
+            "recycled": self.recycled,
+            "discarded_errors": self.discarded_errors,
+            "discarded_history": self.discarded_history,
+        }
@@ -0,0 +1,257 @@
+# Comptabilité LLM par requête : appels, caractères et jetons (estimés) envoyés / reçus, coût,
+# lectures du cache, replis locaux et latences, agrégés par route sur des fenêtres glissantes.
+# La requête courante est portée par une contextvar (héritée par les tâches qu'elle crée, comme le
+# budget de latence) : les sessions LLM mesurées et les points de repli y ajoutent leurs chiffres
+# sans paramètre supplémentaire ; hors requête suivie, ces appels ne comptent nulle part.
+# Une tâche qui survit à sa requête (appel LLM poursuivi en fond) est détachée : la suite de ses
+# appels est comptée sous « background:<route> », jamais dans la requête déjà terminée.
+# Le fournisseur ne renvoie pas le nombre de jetons : estimation à ~4 caractères par jeton.
+
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import Context, ContextVar
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional, Sequence
+
+from resilience import LatencyTracker
+
+CHARS_PER_TOKEN = 4.0
+
+
+def estimate_tokens(chars: int) -> int:
+    return int(round(chars / CHARS_PER_TOKEN))
+
+
+class RequestUsage:
+    """Chiffres LLM d'une requête (ou d'un travail de fond)"""
+
+    __slots__ = ("endpoint", "passage", "started", "finished_at", "duration", "status", "llm_calls",
+                 "llm_errors", "prompt_chars", "response_chars", "cache_hits", "fallbacks", "call_latencies")
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.passage: Optional[str] = None
+        self.started = time.perf_counter()
+        self.finished_at: Optional[float] = None
+        self.duration = 0.0
+        self.status: Optional[int] = None
+        self.llm_calls = 0
+        self.llm_errors = 0
+        self.prompt_chars = 0
+        self.response_chars = 0
+        self.cache_hits = 0
+        self.fallbacks = 0
+        self.call_latencies: List[float] = []
+
+
+current_usage: ContextVar[Optional[RequestUsage]] = ContextVar("current_usage", default=None)
+
+
+def note_passage(passage: str) -> None:
+    """Rattache la requête courante à un passage (le premier noté l'emporte)"""
+    usage = current_usage.get()
+    if usage is not None and usage.passage is None:
+        usage.passage = passage
+
+
+def note_cache_hit() -> None:
+    usage = current_usage.get()
+    if usage is not None:
+        usage.cache_hits += 1
+
+
+def note_fallback(count: int = 1) -> None:
+    usage = current_usage.get()
+    if usage is not None:
+        usage.fallbacks += count
+
+
+def _note_call(prompt_chars: int, response_chars: int, latency: float, ok: bool) -> None:
+    usage = current_usage.get()
+    if usage is None:
+        return
+    usage.llm_calls += 1
+    usage.prompt_chars += prompt_chars
+    usage.response_chars += response_chars
+    usage.call_latencies.append(latency)
+    if not ok:
+        usage.llm_errors += 1
+
+
+class MeteredChat:
+    """Enveloppe d'une session LLM (LlmChat) qui compte chaque appel dans la requête courante"""
+
+    def __init__(self, client: Any):
+        self._client = client
+        # stream_message n'existe que si le client sait streamer (voir _stream_llm_reply)
+        if hasattr(client, "stream_message"):
+            self.stream_message = self._stream_message
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    async def send_message(self, message: Any) -> str:
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await self._client.send_message(message)
+            return response
+        finally:
+            _note_call(len(getattr(message, "text", "")), len(response or ""),
+                       time.perf_counter() - started, response is not None)
+
+    async def _stream_message(self, message: Any) -> AsyncIterator[str]:
+        started = time.perf_counter()
+        received = 0
+        ok = False
+        try:
+            async for chunk in self._client.stream_message(message):
+                received += len(chunk or "")
+                yield chunk
+            ok = True
+        finally:
+            _note_call(len(getattr(message, "text", "")), received, time.perf_counter() - started, ok)
+
+
+class LlmUsageTracker:
+    """Requêtes terminées gardées `max(windows)` secondes (au plus `max_requests`), agrégées à la lecture"""
+
+    def __init__(self, windows: Sequence[float] = (60.0, 300.0, 3600.0), max_requests: int = 10000,
+                 input_price_per_mtok: float = 0.0, output_price_per_mtok: float = 0.0, top: int = 10):
+        self.windows = sorted(windows)
+        self.input_price_per_mtok = input_price_per_mtok
+        self.output_price_per_mtok = output_price_per_mtok
+        self.top = top
+        self._finished: Deque[RequestUsage] = deque(maxlen=max_requests)
+        self.in_flight = 0
+
+    @contextmanager
+    def track(self, endpoint: str) -> Iterator[RequestUsage]:
+        """Suit une requête synchrone ou un travail de fond du début à la fin du bloc"""
+        usage = self.begin(endpoint)
+        token = current_usage.set(usage)
+        try:
+            yield usage
+        except BaseException:
+            self.finish(usage, status=500)
+            raise
+        else:
+            self.finish(usage)
+        finally:
+            current_usage.reset(token)
+
+    def begin(self, endpoint: str) -> RequestUsage:
+        self.in_flight += 1
+        return RequestUsage(endpoint)
+
+    def detach(self, context: Context) -> Optional[RequestUsage]:
+        """
+        Contexte d'une tâche qui survit à sa requête (non démarrée ou suspendue) : ses appels suivants
+        vont dans une entrée 'background:<route>' du même passage, à terminer avec finish().
+        """
+        parent = context.get(current_usage)
+        if parent is None:
+            return None
+        usage = self.begin(f"background:{parent.endpoint}")
+        usage.passage = parent.passage
+        context.run(current_usage.set, usage)
+        return usage
+
+    def finish(self, usage: RequestUsage, status: Optional[int] = None) -> None:
+        if usage.finished_at is not None:
+            return
+        self.in_flight -= 1
+        usage.duration = time.perf_counter() - usage.started
+        usage.finished_at = time.monotonic()
+        usage.status = status
+        self._finished.append(usage)
+
+    async def finish_after(self, body: AsyncIterator[bytes], usage: RequestUsage,
+                           status: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Corps de réponse (éventuellement en flux) ; la requête se termine avec son dernier octet"""
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            self.finish(usage, status)
+
+    def cost(self, prompt_chars: int, response_chars: int) -> float:
+        return (estimate_tokens(prompt_chars) * self.input_price_per_mtok
+                + estimate_tokens(response_chars) * self.output_price_per_mtok) / 1_000_000
+
+    def _prune(self, now: float) -> None:
+        horizon = self.windows[-1] if self.windows else 0.0
+        while self._finished and now - self._finished[0].finished_at > horizon:
+            self._finished.popleft()
+
+    def _aggregate(self, usages: List[RequestUsage]) -> Dict[str, Any]:
+        requests = len(usages)
+        request_latency = LatencyTracker(window=max(1, requests))
+        call_latency = LatencyTracker(window=max(1, sum(len(u.call_latencies) for u in usages)))
+        totals = {"llm_calls": 0, "llm_errors": 0, "prompt_chars": 0, "response_chars": 0,
+                  "cache_hits": 0, "fallbacks": 0}
+        errors = 0
+        for u in usages:
+            request_latency.record(u.duration)
+            for latency in u.call_latencies:
+                call_latency.record(latency)
+            for name in totals:
+                totals[name] += getattr(u, name)
+            if u.status is not None and u.status >= 500:
+                errors += 1
+        cost = self.cost(totals["prompt_chars"], totals["response_chars"])
+        return {
+            "requests": requests,
+            "request_errors": errors,
+            **totals,
+            "prompt_tokens_est": estimate_tokens(totals["prompt_chars"]),
+            "response_tokens_est": estimate_tokens(totals["response_chars"]),
+            "cost_usd_est": round(cost, 6),
+            "cost_usd_per_request": round(cost / requests, 6) if requests else 0.0,
+            "calls_per_request": round(totals["llm_calls"] / requests, 2) if requests else 0.0,
+            "request_latency": request_latency.stats(),
+            "call_latency": call_latency.stats(),
+        }
+
+    def _top_passages(self, usages: List[RequestUsage]) -> Dict[str, List[Dict[str, Any]]]:
+        by_passage: Dict[str, List[RequestUsage]] = {}
+        for u in usages:
+            if u.passage is not None:
+                by_passage.setdefault(u.passage, []).append(u)
+        rows = []
+        for passage, group in by_passage.items():
+            prompt_chars = sum(u.prompt_chars for u in group)
+            response_chars = sum(u.response_chars for u in group)
+            rows.append({
+                "passage": passage,
+                "requests": len(group),
+                "llm_calls": sum(u.llm_calls for u in group),
+                "cost_usd_est": round(self.cost(prompt_chars, response_chars), 6),
+                "tokens_est": estimate_tokens(prompt_chars + response_chars),
+                "max_request_ms": round(max(u.duration for u in group) * 1000, 1),
+            })
+        return {
+            "by_cost": sorted(rows, key=lambda r: (r["cost_usd_est"], r["tokens_est"]), reverse=True)[:self.top],
+            "by_latency": sorted(rows, key=lambda r: r["max_request_ms"], reverse=True)[:self.top],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        self._prune(now)
+        windows: Dict[str, Any] = {}
+        for window in self.windows:
+            usages = [u for u in self._finished if now - u.finished_at <= window]
+            by_endpoint: Dict[str, List[RequestUsage]] = {}
+            for u in usages:
+                by_endpoint.setdefault(u.endpoint, []).append(u)
+            windows[f"{int(window)}s"] = {
+                "total": self._aggregate(usages),
+                "endpoints": {ep: self._aggregate(group) for ep, group in sorted(by_endpoint.items())},
+                "top_passages": self._top_passages(usages),
+            }
+        return {
+            "in_flight": self.in_flight,
+            "chars_per_token": CHARS_PER_TOKEN,
+            "price_per_mtok_usd": {"input": self.input_price_per_mtok, "output": self.output_price_per_mtok},
+            "windows": windows,
+        }
@@ -0,0 +1,103 @@
+# Préchargement en tâche de fond (basse priorité) des chapitres voisins
+# Les lecteurs étudient dans l'ordre : après Genèse 1 vient Genèse 2. On charge le suivant
+# pendant qu'ils lisent, pour que le clic suivant soit servi par le cache.
+
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class Prefetcher:
+    """File de préchargement bornée, servie par quelques workers, qui s'efface sous la charge"""
+
+    def __init__(
+        self,
+        workers: int = 1,
+        max_queue: int = 32,
+        busy: Optional[Callable[[], bool]] = None,
+        remember: int = 512,
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.busy = busy or (lambda: False)
+        self.remember = remember
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list = []
+        self._seen: "OrderedDict[Hashable, None]" = OrderedDict()
+
+        # Compteurs
+        self.scheduled = 0
+        self.completed = 0
+        self.failed = 0
+        self.skipped_duplicate = 0
+        self.skipped_load = 0
+        self.dropped_full = 0
+
+    # --- Cycle de vie ---
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(max(1, self.workers))]
+
+    async def stop(self) -> None:
+        for t in self._tasks:
+            t.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    # --- Planification ---
+    def schedule(self, key: Hashable, job: Callable[[], Awaitable[Any]]) -> bool:
+        """Ajoute un préchargement ; ne bloque jamais l'appelant (refus silencieux si occupé ou plein)"""
+        if self._queue is None:
+            return False
+        if key in self._seen:
+            self.skipped_duplicate += 1
+            return False
+        if self.busy():
+            self.skipped_load += 1
+            return False
+        try:
+            self._queue.put_nowait((key, job))
+        except asyncio.QueueFull:
+            self.dropped_full += 1
+            return False
+        self._seen[key] = None
+        while len(self._seen) > self.remember:
+            self._seen.popitem(last=False)
+        self.scheduled += 1
+        return True
+
+    async def _worker(self) -> None:
+        while True:
+            key, job = await self._queue.get()
+            try:
+                # Re-vérifie la charge au moment d'exécuter : les requêtes utilisateur passent avant
+                if self.busy():
+                    self.skipped_load += 1
+                    self._seen.pop(key, None)
+                    continue
+                await job()
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                self._seen.pop(key, None)
+                print(f"⚠️ Prefetch {key} failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": bool(self._tasks),
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "failed": self.failed,
+            "skipped_duplicate": self.skipped_duplicate,
+            "skipped_load": self.skipped_load,
+            "dropped_full": self.dropped_full,
+        }
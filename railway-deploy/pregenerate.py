@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Pré-génération des explications verset par verset dans le cache des explications.
+
+Usage :
+    python pregenerate.py "Genèse 1-50"                 # livre entier, par plage de chapitres
+    python pregenerate.py Jean "Romains 1-8" "Psaumes 23"
+    python pregenerate.py Jean --workers 4 --concurrency 4
+
+Seuls les versets absents du cache partent vers le LLM. Les chapitres terminés (tous leurs
+versets en cache) sont notés dans un fichier de reprise : la commande peut être relancée après
+une coupure. Une fois pré-générées, ces études sont servies par simple lecture du cache.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, List, Set, Tuple
+
+from fastapi import HTTPException
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "pregenerate_checkpoint.json")
+
+
+def parse_targets(specs: List[str]) -> List[Tuple[str, int]]:
+    """'Genèse 1-50', 'Jean 3', 'Jean' → [(OSIS, chapitre), ...] dans l'ordre, sans doublons"""
+    from server import resolve_osis
+    from versification import chapter_count
+
+    chapters: List[Tuple[str, int]] = []
+    for spec in specs:
+        spec = spec.strip()
+        m = re.match(r"^(.*?)\s+(\d+)(?:\s*-\s*(\d+))?$", spec)
+        osis = resolve_osis(spec) or (resolve_osis(m.group(1)) if m else None)
+        if not osis:
+            raise ValueError(f"Livre non reconnu: {spec}")
+        count = chapter_count(osis)
+        if resolve_osis(spec):
+            first, last = 1, count
+        else:
+            first = int(m.group(2))
+            last = int(m.group(3)) if m.group(3) else first
+        if not 1 <= first <= last <= count:
+            raise ValueError(f"{spec}: chapitres 1 à {count} seulement")
+        for chapter in range(first, last + 1):
+            if (osis, chapter) not in chapters:
+                chapters.append((osis, chapter))
+    return chapters
+
+
+class Checkpoint:
+    """Chapitres terminés, par modèle, dans un fichier JSON réécrit atomiquement"""
+
+    def __init__(self, path: str, model: str):
+        self.path = path
+        self.model = model
+        self._data: Dict[str, List[str]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._data = json.load(f)
+        self.done: Set[str] = set(self._data.get(model, []))
+
+    def mark(self, osis: str, chapter: int) -> None:
+        self.done.add(f"{osis}.{chapter}")
+        self._data[self.model] = sorted(self.done)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+
+    def __contains__(self, item: Tuple[str, int]) -> bool:
+        return f"{item[0]}.{item[1]}" in self.done
+
+
+async def pregenerate_chapter(bible_id: str, osis: str, chapter: int) -> Tuple[int, int]:
+    """(versets, versets en cache à la fin) pour un chapitre"""
+    import server
+    from versification import BOOK_NAMES_FR
+
+    book_name = BOOK_NAMES_FR.get(osis, osis)
+    text = await server.fetch_passage_text(bible_id, osis, chapter, None)
+    verses = server._split_numbered_verses(text)
+    await server.generate_chapter_explanations(verses, book_name, chapter)
+    cached = sum(1 for num, _ in verses if server._cached_explanation(book_name, chapter, num) is not None)
+    return len(verses), cached
+
+
+async def pregenerate(chapters: List[Tuple[str, int]], checkpoint: Checkpoint, workers: int) -> int:
+    import server
+
+    await server.http_pool.start()
+    todo = [c for c in chapters if c not in checkpoint]
+    print(f"📚 {len(chapters)} chapitres, {len(chapters) - len(todo)} déjà terminés, {len(todo)} à générer")
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in todo:
+        queue.put_nowait(item)
+    incomplete = 0
+    started = time.perf_counter()
+
+    async def worker() -> None:
+        nonlocal incomplete
+        while not queue.empty():
+            osis, chapter = queue.get_nowait()
+            try:
+                total, cached = await pregenerate_chapter(bible_id, osis, chapter)
+            except HTTPException as e:
+                incomplete += 1
+                print(f"⚠️ {osis}.{chapter}: {e.detail}")
+                continue
+            if total and cached == total:
+                checkpoint.mark(osis, chapter)
+                print(f"✅ {osis}.{chapter}: {total} versets en cache ({len(checkpoint.done)} chapitres terminés)")
+            else:
+                incomplete += 1
+                print(f"⚠️ {osis}.{chapter}: {cached}/{total} versets en cache, à reprendre")
+
+    try:
+        bible_id = await server.get_bible_id()
+        await asyncio.gather(*[worker() for _ in range(max(1, workers))])
+    finally:
+        await server.cancel_background_explanations()
+        await server.http_pool.close()
+    print(f"⏱️ {time.perf_counter() - started:.1f}s, {server.explanation_cache.stats()}")
+    return incomplete
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Pré-génère les explications de livres ou de plages de chapitres")
+    parser.add_argument("targets", nargs="+", help="Ex: 'Genèse 1-50', 'Jean', 'Psaumes 23'")
+    parser.add_argument("--workers", type=int, default=2, help="Chapitres traités en parallèle")
+    parser.add_argument("--concurrency", type=int, default=None, help="Plafond des appels LLM simultanés (LLM_CONCURRENCY_MAX)")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_PATH, help="Fichier de reprise")
+    args = parser.parse_args()
+
+    # Réglages à poser avant l'import de server : hors ligne, on attend le LLM plutôt que de se replier
+    if args.concurrency:
+        os.environ["LLM_CONCURRENCY"] = os.environ["LLM_CONCURRENCY_MAX"] = str(args.concurrency)
+    os.environ.setdefault("LLM_VERSE_TIMEOUT", "120")
+    os.environ.setdefault("LLM_LIMIT_MAX_WAIT", "600")
+    os.environ.setdefault("PREFETCH_ENABLED", "0")
+    import server
+
+    if not (server.GEMINI_AVAILABLE and server.EMERGENT_LLM_KEY):
+        print("❌ LLM indisponible (EMERGENT_LLM_KEY / emergentintegrations, ou LLM_FAKE=1)")
+        return 1
+    if server.explanation_cache.path is None:
+        print("❌ Cache des explications désactivé (EXPLANATION_CACHE=0)")
+        return 1
+    try:
+        chapters = parse_targets(args.targets)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    checkpoint = Checkpoint(args.checkpoint, server.LLM_MODEL_ID)
+    incomplete = asyncio.run(pregenerate(chapters, checkpoint, args.workers))
+    print(f"🎉 {len(checkpoint.done)} chapitres terminés" + (f", {incomplete} à reprendre" if incomplete else ""))
+    return 1 if incomplete else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
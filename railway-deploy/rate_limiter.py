@@ -0,0 +1,121 @@
+# Limiteur de débit côté client (seau à jetons) pour les appels api.bible
+# - file d'attente équitable (FIFO) : les appels passent dans l'ordre d'arrivée
+# - attente maximale : au-delà, l'appel est refusé plutôt que de bloquer le worker
+# - Retry-After : une réponse 429 suspend le seau pendant la durée demandée
+
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from resilience import Histogram
+
+
+class RateLimitTimeout(Exception):
+    """Le jeton n'a pas pu être obtenu dans le délai d'attente maximal"""
+
+
+class TokenBucketLimiter:
+    """Seau à jetons : `rate` jetons par seconde, jusqu'à `burst` jetons d'avance"""
+
+    def __init__(self, rate: float = 10.0, burst: int = 20, max_wait: float = 10.0, max_queue: int = 200):
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        # asyncio.Lock réveille ses attentes dans l'ordre d'arrivée : c'est la file FIFO
+        self._turn = asyncio.Lock()
+        self.queue_depth = 0
+
+        # Compteurs et histogrammes
+        self.granted = 0
+        self.rejected_timeout = 0
+        self.rejected_queue_full = 0
+        self.retry_after_pauses = 0
+        self.wait_ms = Histogram([1, 5, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000])
+        self.depth_on_arrival = Histogram([0, 1, 2, 5, 10, 20, 50, 100, 200])
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _delay_until_token(self) -> float:
+        self._refill()
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            return pause
+        if self._tokens >= 1.0:
+            return 0.0
+        return (1.0 - self._tokens) / self.rate
+
+    async def acquire(self, max_wait: Optional[float] = None) -> None:
+        """Attend son tour puis un jeton ; lève RateLimitTimeout si l'attente dépasse max_wait"""
+        if self.queue_depth >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise RateLimitTimeout("file d'attente api.bible pleine")
+        self.depth_on_arrival.observe(self.queue_depth)
+        self.queue_depth += 1
+        started = time.monotonic()
+        try:
+            async with asyncio.timeout(self.max_wait if max_wait is None else max_wait):
+                async with self._turn:
+                    while True:
+                        delay = self._delay_until_token()
+                        if delay <= 0:
+                            self._tokens -= 1.0
+                            break
+                        await asyncio.sleep(delay)
+        except TimeoutError:
+            self.rejected_timeout += 1
+            raise RateLimitTimeout("attente maximale du quota api.bible dépassée")
+        finally:
+            self.queue_depth -= 1
+            self.wait_ms.observe((time.monotonic() - started) * 1000)
+        self.granted += 1
+
+    def try_acquire(self) -> bool:
+        """Prend un jeton seulement s'il est disponible tout de suite et que personne n'attend"""
+        if self.queue_depth or self._turn.locked() or self._delay_until_token() > 0:
+            return False
+        self._tokens -= 1.0
+        self.granted += 1
+        return True
+
+    def pause(self, seconds: float) -> None:
+        """Suspend la distribution de jetons (réponse 429 avec Retry-After)"""
+        self.retry_after_pauses += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + max(0.0, seconds))
+        self._tokens = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 2),
+            "queue_depth": self.queue_depth,
+            "granted": self.granted,
+            "rejected_timeout": self.rejected_timeout,
+            "rejected_queue_full": self.rejected_queue_full,
+            "retry_after_pauses": self.retry_after_pauses,
+            "wait_ms": self.wait_ms.stats(),
+            "queue_depth_on_arrival": self.depth_on_arrival.stats(),
+        }
+
+
+def parse_retry_after(value: Optional[str], default: float = 1.0) -> float:
+    """En-tête Retry-After : nombre de secondes ou date HTTP"""
+    if not value:
+        return default
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,353 @@
+# Outils de résilience pour les appels amont (api.bible, LLM)
+# - CircuitBreaker : échoue vite quand l'amont est en panne
+# - LatencyTracker + hedged() : seconde tentative après le p95 observé
+# - LatencyBudget : budget de latence global d'une requête, partagé par ses étapes (contextvar)
+# - AdaptiveConcurrencyLimiter : plafond de concurrence AIMD (hausse additive, baisse multiplicative)
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterator, Optional, Sequence
+
+
+class CircuitBreaker:
+    """Disjoncteur fermé → ouvert (après N échecs consécutifs) → semi-ouvert (essai) → fermé"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0, half_open_max: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max = half_open_max
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._half_open_in_flight = 0
+
+        # Compteurs
+        self.rejected = 0
+        self.opened = 0
+        self.successes = 0
+        self.failures = 0
+
+    def allow(self) -> bool:
+        """True si l'appel peut partir ; en semi-ouvert, seul un nombre limité d'essais passe"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._half_open_in_flight = 0
+        if self.state == self.HALF_OPEN:
+            if self._half_open_in_flight >= self.half_open_max:
+                self.rejected += 1
+                return False
+            self._half_open_in_flight += 1
+        return True
+
+    def release(self) -> None:
+        """Essai semi-ouvert abandonné (annulation) sans verdict : libère sa place"""
+        if self.state == self.HALF_OPEN and self._half_open_in_flight > 0:
+            self._half_open_in_flight -= 1
+
+    def record_success(self) -> None:
+        self.successes += 1
+        self.consecutive_failures = 0
+        if self.state == self.HALF_OPEN:
+            print(f"✅ Circuit {self.name} closed")
+        self.state = self.CLOSED
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.opened += 1
+                print(f"🔌 Circuit {self.name} open for {self.reset_timeout}s")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "successes": self.successes,
+            "failures": self.failures,
+        }
+
+
+class LatencyTracker:
+    """Fenêtre glissante des latences récentes (secondes) pour estimer les percentiles"""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        idx = min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered))) - 1))
+        return ordered[idx]
+
+    def stats(self) -> Dict[str, Any]:
+        def ms(v: Optional[float]) -> Optional[float]:
+            return round(v * 1000, 1) if v is not None else None
+        return {"samples": len(self), "p50_ms": ms(self.percentile(50)), "p95_ms": ms(self.percentile(95)),
+                "p99_ms": ms(self.percentile(99))}
+
+
+class Histogram:
+    """Histogramme à seuils fixes (bornes supérieures incluses), plus somme et compte"""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        buckets = {f"le_{b:g}": c for b, c in zip(self.bounds, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {"count": self.count, "sum": round(self.total, 3),
+                "avg": round(self.total / self.count, 3) if self.count else 0.0, "buckets": buckets}
+
+
+async def hedged(
+    attempt: Callable[[], Awaitable[Any]], delay: Optional[float], can_hedge: Optional[Callable[[], bool]] = None
+) -> Any:
+    """
+    Lance attempt() ; si aucune réponse après `delay` secondes, lance une seconde tentative.
+    Renvoie le premier succès et annule l'autre. delay=None désactive la couverture.
+    can_hedge() est consulté au moment de couvrir : False = on se contente de la première tentative.
+    Le résultat est un tuple (valeur, hedge_envoyée, hedge_gagnante).
+    """
+    first = asyncio.create_task(attempt())
+    if delay is None:
+        return await first, False, False
+    tasks = [first]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if done:
+            return first.result(), False, False
+        if can_hedge is not None and not can_hedge():
+            return await first, False, False
+        tasks.append(asyncio.create_task(attempt()))
+        while tasks:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            failure: Optional[BaseException] = None
+            for t in done:
+                tasks.remove(t)
+                if t.exception() is None:
+                    return t.result(), True, t is not first
+                failure = t.exception()
+            if not tasks:
+                # Les deux tentatives ont échoué : on propage la dernière erreur
+                raise failure
+        raise RuntimeError("hedged: aucune tentative lancée")
+    finally:
+        for t in tasks:
+            if not t.done():
+                t.cancel()
+
+
+# --- Budget de latence par requête ---
+class LatencyBudget:
+    """Échéance absolue partagée par toutes les étapes d'une même requête"""
+
+    def __init__(self, seconds: float):
+        self.total = seconds
+        self.deadline = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def timeout(self, default: float) -> float:
+        """Timeout d'une étape : le plus petit entre son défaut et ce qui reste du budget"""
+        return min(default, self.remaining())
+
+
+current_budget: ContextVar[Optional[LatencyBudget]] = ContextVar("current_budget", default=None)
+
+
+@contextmanager
+def latency_budget(seconds: float) -> Iterator[LatencyBudget]:
+    """Ouvre un budget pour le contexte courant (et les tâches qu'il crée)"""
+    budget = LatencyBudget(seconds)
+    token = current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        current_budget.reset(token)
+
+
+def stage_timeout(default: float) -> float:
+    """Timeout à utiliser pour une étape, borné par le budget de la requête s'il existe"""
+    budget = current_budget.get()
+    return budget.timeout(default) if budget is not None else default
+
+
+# --- Concurrence adaptative ---
+class ConcurrencyLimitExceeded(Exception):
+    """Pas de place sous le plafond de concurrence dans le délai imparti (ou file pleine)"""
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Plafond de concurrence AIMD :
+    - chaque succès plus rapide que la cible ajoute increase/limite (≈ +increase par « tour » complet)
+    - une erreur, un dépassement de la cible ou un abandon tardif multiplie la limite par `backoff`
+      (au plus une baisse par `cooldown` secondes, pour qu'une rafale d'échecs simultanés ne
+      fasse pas s'effondrer la limite)
+    Les appels en attente sont servis dans l'ordre d'arrivée.
+    """
+
+    def __init__(self, name: str, initial: float = 4, min_limit: float = 1, max_limit: float = 32,
+                 increase: float = 1.0, backoff: float = 0.5, latency_target: float = 10.0,
+                 cooldown: float = 1.0, max_wait: float = 30.0, max_queue: int = 200):
+        self.name = name
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.backoff = backoff
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+
+        # Compteurs
+        self.successes = 0
+        self.failures = 0
+        self.slow = 0
+        self.increases = 0
+        self.decreases = 0
+        self.rejected_timeout = 0
+        self.rejected_queue_full = 0
+
+    def _capacity(self) -> int:
+        return max(1, int(self.limit))
+
+    @property
+    def saturated(self) -> bool:
+        """Plus aucune place libre sous la limite (ou des appels déjà en attente)"""
+        return bool(self._waiters) or self.in_flight >= self._capacity()
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < self._capacity():
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self.in_flight += 1
+                fut.set_result(None)
+
+    async def acquire(self, max_wait: Optional[float] = None) -> None:
+        if not self._waiters and self.in_flight < self._capacity():
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise ConcurrencyLimitExceeded(f"{self.name}: {len(self._waiters)} appels en attente")
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await asyncio.wait_for(fut, timeout=self.max_wait if max_wait is None else max_wait)
+        except asyncio.TimeoutError:
+            self.rejected_timeout += 1
+            raise ConcurrencyLimitExceeded(f"{self.name}: pas de place sous la limite {self._capacity()}") from None
+        except asyncio.CancelledError:
+            # Place accordée au moment même de l'annulation : on la rend
+            if fut.done() and not fut.cancelled():
+                self.in_flight -= 1
+                self._wake()
+            raise
+        finally:
+            if fut in self._waiters:
+                self._waiters.remove(fut)
+
+    def release(self, ok: Optional[bool], latency: float, latency_target: Optional[float] = None) -> None:
+        """ok=True succès, False échec, None sans verdict (annulation rapide)"""
+        self.in_flight -= 1
+        target = self.latency_target if latency_target is None else latency_target
+        if ok is True and latency <= target:
+            self.successes += 1
+            if self.limit < self.max_limit:
+                self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+                self.increases += 1
+        elif ok is not None:
+            if ok:
+                self.successes += 1
+                self.slow += 1
+            else:
+                self.failures += 1
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown and self.limit > self.min_limit:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self.decreases += 1
+                self._last_decrease = now
+                print(f"📉 {self.name} concurrency limit → {self._capacity()}")
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, latency_target: Optional[float] = None, max_wait: Optional[float] = None) -> AsyncIterator[None]:
+        """Réserve une place ; l'issue (succès, exception, lenteur) ajuste la limite"""
+        await self.acquire(max_wait)
+        target = self.latency_target if latency_target is None else latency_target
+        started = time.monotonic()
+        ok: Optional[bool] = None
+        try:
+            yield
+            ok = True
+        except asyncio.CancelledError:
+            # Abandon (timeout appelant, client parti) : compte comme un échec seulement s'il était déjà trop lent
+            ok = False if time.monotonic() - started > target else None
+            raise
+        except Exception:
+            ok = False
+            raise
+        finally:
+            self.release(ok, time.monotonic() - started, target)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": round(self.limit, 2),
+            "effective_limit": self._capacity(),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "successes": self.successes,
+            "failures": self.failures,
+            "slow": self.slow,
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "rejected_timeout": self.rejected_timeout,
+            "rejected_queue_full": self.rejected_queue_full,
+        }
@@ -0,0 +1,160 @@
+# Cache à deux niveaux pour les réponses api.bible
+# - mémoire : LRU borné en octets, avec éviction
+# - disque  : SQLite, survit aux redémarrages
+# Les entrées ont une durée de vie (TTL) ; une entrée expirée est revalidée par ETag/If-None-Match.
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "api_cache.sqlite")
+
+
+@dataclass
+class CacheEntry:
+    """Réponse mise en cache (corps JSON brut + ETag éventuel)"""
+    body: str
+    etag: Optional[str] = None
+    stored_at: float = 0.0
+
+    @property
+    def size(self) -> int:
+        return len(self.body.encode("utf-8")) + len(self.etag or "")
+
+
+class ResponseCache:
+    """Cache LRU mémoire (en octets) adossé à un cache disque SQLite"""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl: float = 7 * 24 * 3600, disk_path: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk_path = disk_path
+        self._memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._disk: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+        # Compteurs
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stores = 0
+        self.revalidations = 0
+        self.stale = 0
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        disk_enabled = os.getenv("API_CACHE_DISK", "1") not in ("0", "false", "False")
+        return cls(
+            max_bytes=int(os.getenv("API_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+            ttl=float(os.getenv("API_CACHE_TTL", str(7 * 24 * 3600))),
+            disk_path=os.getenv("API_CACHE_PATH", DEFAULT_CACHE_PATH) if disk_enabled else None,
+        )
+
+    # --- Disque ---
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if self.disk_path is None:
+            return None
+        if self._disk is None:
+            with self._lock:
+                if self._disk is None:
+                    os.makedirs(os.path.dirname(self.disk_path) or ".", exist_ok=True)
+                    conn = sqlite3.connect(self.disk_path, check_same_thread=False)
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS responses ("
+                        "key TEXT PRIMARY KEY, body TEXT NOT NULL, etag TEXT, stored_at REAL NOT NULL)"
+                    )
+                    self._disk = conn
+        return self._disk
+
+    def _disk_get(self, key: str) -> Optional[CacheEntry]:
+        db = self._db()
+        if db is None:
+            return None
+        row = db.execute("SELECT body, etag, stored_at FROM responses WHERE key=?", (key,)).fetchone()
+        return CacheEntry(row[0], row[1], row[2]) if row else None
+
+    def _disk_put(self, key: str, entry: CacheEntry) -> None:
+        db = self._db()
+        if db is None:
+            return
+        with self._lock, db:
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, body, etag, stored_at) VALUES (?, ?, ?, ?)",
+                (key, entry.body, entry.etag, entry.stored_at),
+            )
+
+    # --- Mémoire ---
+    def _memory_put(self, key: str, entry: CacheEntry) -> None:
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+        if entry.size > self.max_bytes:
+            return
+        self._memory[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    # --- API ---
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return (time.time() - entry.stored_at) < self.ttl
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """Entrée fraîche ou expirée (à revalider) ; None si absente des deux niveaux"""
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+        else:
+            entry = self._disk_get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._memory_put(key, entry)
+        if not self.is_fresh(entry):
+            self.stale += 1
+        return entry
+
+    def put(self, key: str, body: str, etag: Optional[str] = None) -> CacheEntry:
+        entry = CacheEntry(body=body, etag=etag, stored_at=time.time())
+        self._memory_put(key, entry)
+        self._disk_put(key, entry)
+        self.stores += 1
+        return entry
+
+    def revalidated(self, key: str, entry: CacheEntry) -> CacheEntry:
+        """Réponse 304 : l'entrée existante repart pour un TTL complet"""
+        self.revalidations += 1
+        return self.put(key, entry.body, entry.etag)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "disk_path": self.disk_path,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            "stale": self.stale,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+            "stores": self.stores,
+        }
+
+
+# Instance globale pour les réponses api.bible
+api_cache = ResponseCache.from_env()
@@ -5,17 +5,46 @@
 # - Génération automatique d'explications théologiques via LLM
 # - Renvoie toujours {"content": "..."} pour coller au front.
 
+import asyncio
+import contextvars
+import json
 import os
 import re
+import time
 import unicodedata
-from typing import Dict, List, Optional
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode
 from dotenv import load_dotenv
 
 import httpx
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
+from darby_store import darby_store, split_verse_id
+from explanation_cache import explanation_cache, template_hash
+from fallback_rules import fallback_rules
+from http_client import http_pool
+from jobs import DEFAULT_JOBS_PATH, Job, JobQueue, JobQueueFull, SqliteJobStore
+from llm_pool import LlmSessionPool
+from llm_usage import LlmUsageTracker, MeteredChat, current_usage, note_cache_hit, note_fallback, note_passage
+from response_cache import api_cache
+from prefetch import Prefetcher
+from rate_limiter import RateLimitTimeout, TokenBucketLimiter, parse_retry_after
+from resilience import (
+    AdaptiveConcurrencyLimiter,
+    CircuitBreaker,
+    LatencyTracker,
+    hedged,
+    latency_budget,
+    stage_timeout,
+)
+from singleflight import SingleFlight
+from sse import SSE_HEADERS, sse_event, with_keepalive
+from versification import BOOK_NAMES_FR, max_chapter_count, neighbour_chapter, verse_ids
+
 # Import our new intelligent generators
 try:
     from theological_database import theological_db
@@ -37,6 +66,13 @@ except ImportError:
 # Charger les variables d'environnement
 load_dotenv()
 
+# Stand-in local du LLM (benchmarks hors ligne : pas de coût, pas de réseau) — voir fake_llm.py
+LLM_FAKE = os.getenv("LLM_FAKE", "0") in ("1", "true", "True")
+if LLM_FAKE:
+    from fake_llm import LlmChat, UserMessage
+    GEMINI_AVAILABLE = True
+    print("🧪 Fake LLM enabled - Gemini calls are simulated locally")
+
 # Configuration Railway
 PORT = int(os.getenv("PORT", 8000))
 
@@ -44,7 +80,71 @@ API_BASE = "https://api.scripture.api.bible/v1"
 APP_NAME = "Bible Study API - Darby"
 BIBLE_API_KEY = os.getenv("BIBLE_API_KEY", "0cff5d83f6852c3044a180cc4cdeb0fe")
 PREFERRED_BIBLE_ID = os.getenv("BIBLE_ID", "a93a92589195411f-01")  # Bible J.N. Darby (French)
-EMERGENT_LLM_KEY = os.getenv("EMERGENT_LLM_KEY")
+EMERGENT_LLM_KEY = os.getenv("EMERGENT_LLM_KEY") or ("fake" if LLM_FAKE else None)
+# Nombre max de versets récupérés en parallèle sur le chemin "un appel par verset"
+VERSE_FETCH_CONCURRENCY = int(os.getenv("VERSE_FETCH_CONCURRENCY", "8"))
+# Préchargement du chapitre voisin (désactivable) ; suspendu dès que le pool HTTP est chargé
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") not in ("0", "false", "False")
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "1"))
+PREFETCH_BUSY_INFLIGHT = int(os.getenv("PREFETCH_BUSY_INFLIGHT", "8"))
+# Préchargement des explications du chapitre suivant (études verset par verset) ; s'efface dès que le plafond LLM est atteint
+PREFETCH_EXPLANATIONS = os.getenv("PREFETCH_EXPLANATIONS", "1") not in ("0", "false", "False")
+# Résilience api.bible : disjoncteur, requêtes couvertes (hedging) et budget de latence par requête
+API_BREAKER_FAILURES = int(os.getenv("API_BREAKER_FAILURES", "5"))
+API_BREAKER_RESET = float(os.getenv("API_BREAKER_RESET", "30"))
+API_HEDGE_ENABLED = os.getenv("API_HEDGE_ENABLED", "0") in ("1", "true", "True")
+API_HEDGE_MIN_DELAY = float(os.getenv("API_HEDGE_MIN_DELAY", "0.2"))
+REQUEST_BUDGET_SECONDS = float(os.getenv("REQUEST_BUDGET_SECONDS", "60"))
+# Quota api.bible : seau à jetons partagé par tous les appels sortants
+API_RATE_PER_SEC = float(os.getenv("API_RATE_PER_SEC", "10"))
+API_RATE_BURST = int(os.getenv("API_RATE_BURST", "20"))
+API_RATE_MAX_WAIT = float(os.getenv("API_RATE_MAX_WAIT", "10"))
+API_RATE_MAX_QUEUE = int(os.getenv("API_RATE_MAX_QUEUE", "200"))
+# Explications verset par verset : "batch" = un appel LLM par lot de LLM_BATCH_SIZE versets, "per_verse" = un appel par verset
+LLM_VERSE_MODE = os.getenv("LLM_VERSE_MODE", "batch")
+# 12 versets × 150-200 mots tiennent sous le plafond de jetons de sortie du modèle (8 192)
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "12"))
+# Durée maximale d'un appel par lot (bornée par le budget de la requête) ; au-delà, repli verset par verset.
+# Nettement sous REQUEST_BUDGET_SECONDS pour laisser au repli par verset le temps de s'exécuter
+LLM_BATCH_TIMEOUT = float(os.getenv("LLM_BATCH_TIMEOUT", "25"))
+# Appels LLM simultanés (tous chapitres confondus) et timeout d'une explication unitaire
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+LLM_VERSE_TIMEOUT = float(os.getenv("LLM_VERSE_TIMEOUT", "20"))
+# Plafond adaptatif (AIMD) des appels LLM : LLM_CONCURRENCY est la limite de départ, bornée par min/max ;
+# un appel plus lent que sa cible (verset / étude longue) ou en erreur fait baisser la limite
+LLM_CONCURRENCY_MIN = int(os.getenv("LLM_CONCURRENCY_MIN", "1"))
+LLM_CONCURRENCY_MAX = int(os.getenv("LLM_CONCURRENCY_MAX", "16"))
+LLM_VERSE_LATENCY_TARGET = float(os.getenv("LLM_VERSE_LATENCY_TARGET", str(LLM_VERSE_TIMEOUT)))
+LLM_STUDY_LATENCY_TARGET = float(os.getenv("LLM_STUDY_LATENCY_TARGET", "60"))
+LLM_LIMIT_MAX_WAIT = float(os.getenv("LLM_LIMIT_MAX_WAIT", "30"))
+# Études enrichies en 28 rubriques : "auto" = un appel par rubrique si requestedRubriques n'en demande
+# qu'une partie, un seul grand prompt sinon ; "per_rubric" = toujours un appel par rubrique ; "single" = jamais
+LLM_STUDY_MODE = os.getenv("LLM_STUDY_MODE", "auto")
+# Appels par rubrique simultanés pour une même étude (le plafond global reste celui ci-dessus)
+LLM_RUBRIC_CONCURRENCY = int(os.getenv("LLM_RUBRIC_CONCURRENCY", "4"))
+# Sessions LLM réutilisées : sessions inactives gardées, appels par session avant recyclage
+LLM_POOL_MAX_IDLE = int(os.getenv("LLM_POOL_MAX_IDLE", "8"))
+LLM_SESSION_MAX_USES = int(os.getenv("LLM_SESSION_MAX_USES", "50"))
+# Appels LLM poursuivis en tâche de fond après repli local (nombre max, durée max) pour remplir le cache
+LLM_BACKGROUND_MAX = int(os.getenv("LLM_BACKGROUND_MAX", "8"))
+LLM_BACKGROUND_TIMEOUT = float(os.getenv("LLM_BACKGROUND_TIMEOUT", "120"))
+# Flux SSE verset par verset : versets générés d'avance au plus (au-delà, on attend le client) et ping
+SSE_LOOKAHEAD_VERSES = int(os.getenv("SSE_LOOKAHEAD_VERSES", "40"))
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+# Travaux de génération asynchrones (/api/jobs) : workers, file max, rétention des résultats, persistance
+JOBS_WORKERS = int(os.getenv("JOBS_WORKERS", "2"))
+JOBS_MAX_QUEUE = int(os.getenv("JOBS_MAX_QUEUE", "100"))
+JOBS_TTL = float(os.getenv("JOBS_TTL", "3600"))
+JOBS_PERSIST = os.getenv("JOBS_PERSIST", "0") in ("1", "true", "True")
+JOBS_STORE_PATH = os.getenv("JOBS_STORE_PATH", DEFAULT_JOBS_PATH)
+# Comptabilité LLM par requête (/api/metrics/llm) : fenêtres glissantes (s), requêtes gardées au plus,
+# prix du modèle en $ par million de jetons (entrée / sortie) pour l'estimation du coût
+LLM_METRICS_WINDOWS = [float(w) for w in os.getenv("LLM_METRICS_WINDOWS", "60,300,3600").split(",") if w.strip()]
+LLM_METRICS_MAX_REQUESTS = int(os.getenv("LLM_METRICS_MAX_REQUESTS", "10000"))
+LLM_PRICE_INPUT_PER_MTOK = float(os.getenv("LLM_PRICE_INPUT_PER_MTOK", "0.10"))
+LLM_PRICE_OUTPUT_PER_MTOK = float(os.getenv("LLM_PRICE_OUTPUT_PER_MTOK", "0.40"))
+# Jeton des routes d'administration (/api/admin/...) ; non défini = routes désactivées
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 
 # --- CORS ---
 _default_origins = [
@@ -55,7 +155,53 @@ _default_origins = [
 _extra = [o.strip() for o in os.getenv("ALLOWED_ORIGINS", "").split(",") if o.strip()]
 ALLOW_ORIGINS = _default_origins + _extra
 
-app = FastAPI(title="FastAPI", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Un seul client HTTP (keep-alive, HTTP/2) pour toute la durée de vie de l'application
+    await http_pool.start()
+    if PREFETCH_ENABLED:
+        await prefetcher.start()
+        if PREFETCH_EXPLANATIONS:
+            await explanation_prefetcher.start()
+    await job_queue.start()
+    try:
+        yield
+    finally:
+        await job_queue.stop()
+        await explanation_prefetcher.stop()
+        await prefetcher.stop()
+        await cancel_background_explanations()
+        await http_pool.close()
+
+app = FastAPI(title="FastAPI", version="0.1.0", lifespan=lifespan)
+@app.middleware("http")
+async def request_latency_budget(request: Request, call_next):
+    # Chaque requête dispose d'un budget global que ses étapes (api.bible, LLM...) se partagent.
+    # Les flux SSE (/stream) en sont exemptés : le budget couvrirait tout le corps de la réponse et,
+    # une fois épuisé, chaque verset restant tomberait d'office en repli local. Chacune de leurs
+    # étapes garde son propre timeout (LLM_VERSE_TIMEOUT par verset, timeout de l'appel api.bible)
+    if request.url.path.endswith("/stream"):
+        return await call_next(request)
+    with latency_budget(REQUEST_BUDGET_SECONDS):
+        return await call_next(request)
+
+@app.middleware("http")
+async def llm_request_accounting(request: Request, call_next):
+    # Routes de génération : appels LLM, cache et replis comptés jusqu'au dernier octet de la réponse
+    if request.method != "POST" or not request.url.path.startswith("/api/generate"):
+        return await call_next(request)
+    usage = llm_accounting.begin(request.url.path)
+    token = current_usage.set(usage)
+    try:
+        response = await call_next(request)
+    except BaseException:
+        llm_accounting.finish(usage, status=500)
+        raise
+    finally:
+        current_usage.reset(token)
+    response.body_iterator = llm_accounting.finish_after(response.body_iterator, usage, response.status_code)
+    return response
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOW_ORIGINS if _extra else ["*"],  # large en phase de test
@@ -67,29 +213,19 @@ app.add_middleware(
 # =========================
 # GOOGLE GEMINI FLASH INTEGRATION
 # =========================
-async def generate_enhanced_content_with_gemini(passage: str, rubric_type: str, base_content: str = "") -> str:
-    """
-    Utilise Google Gemini Flash pour enrichir le contenu théologique
-    """
-    if not GEMINI_AVAILABLE or not EMERGENT_LLM_KEY:
-        print("⚠️ Gemini not available, using base content")
-        return base_content
-    
-    try:
-        # Initialiser le chat avec Gemini Flash
-        chat = LlmChat(
-            api_key=EMERGENT_LLM_KEY,
-            session_id=f"bible_study_{passage.replace(' ', '_')}",
-            system_message=(
-                "Tu es un théologien expert spécialisé dans l'étude biblique approfondie. "
-                "Tu génères des contenus théologiques riches, contextualisés et spirituellement édifiants en français. "
-                "Tes explications sont accessibles mais profondes, toujours fidèles au texte biblique."
-            )
-        ).with_model("gemini", "gemini-2.0-flash")
-        
-        # Créer le prompt selon le type de rubrique
-        if rubric_type == "verse_by_verse":
-            prompt = f"""
+# Modèle et messages système partagés par toutes les générations (entrent dans les clés du cache)
+LLM_PROVIDER = "gemini"
+LLM_MODEL = "gemini-2.0-flash"
+LLM_MODEL_ID = f"{LLM_PROVIDER}/{LLM_MODEL}"
+STUDY_SYSTEM_MESSAGE = (
+    "Tu es un théologien expert spécialisé dans l'étude biblique approfondie. "
+    "Tu génères des contenus théologiques riches, contextualisés et spirituellement édifiants en français. "
+    "Tes explications sont accessibles mais profondes, toujours fidèles au texte biblique."
+)
+VERSE_SYSTEM_MESSAGE = "Tu es un théologien expert qui génère des explications bibliques spécifiques et contextuelles en français."
+
+ENHANCED_PROMPTS: Dict[str, str] = {
+    "verse_by_verse": """
 Génère une étude théologique approfondie verset par verset pour le passage biblique : {passage}
 
 Pour chaque verset :
@@ -109,9 +245,8 @@ Format souhaité :
 [analyse détaillée du verset]
 
 Assure-toi que chaque explication soit substantielle (200-300 mots) et spirituellement enrichissante.
-"""
-        elif rubric_type == "thematic_study":
-            prompt = f"""
+""",
+    "thematic_study": """
 Génère une étude thématique approfondie pour le passage biblique : {passage}
 
 Structure requise avec les 28 rubriques d'étude biblique :
@@ -201,25 +336,268 @@ Structure requise avec les 28 rubriques d'étude biblique :
 [Actions concrètes à entreprendre]
 
 Chaque section doit être substantielle et adaptée spécifiquement au passage {passage}.
-"""
-        else:
-            prompt = f"Génère un contenu théologique enrichi pour le passage {passage} sur le thème : {rubric_type}. Sois détaillé et spirituellement édifiant."
+""",
+}
+ENHANCED_DEFAULT_PROMPT = "Génère un contenu théologique enrichi pour le passage {passage} sur le thème : {rubric_type}. Sois détaillé et spirituellement édifiant."
+
+
+def _passage_cache_key(passage: str) -> Tuple[str, int, int]:
+    """(livre OSIS, chapitre, verset ou 0) pour le cache des contenus générés"""
+    try:
+        _, osis, chapter, verse = parse_passage_input(passage)
+        return osis, chapter, verse or 0
+    except HTTPException:
+        return passage.strip(), 0, 0
+
+
+def _enhanced_cache_slot(passage: str, rubric_type: str) -> Tuple[str, Tuple[str, int, int], str]:
+    """(gabarit de prompt, clé passage, empreinte du gabarit) d'un contenu enrichi"""
+    template = ENHANCED_PROMPTS.get(rubric_type, ENHANCED_DEFAULT_PROMPT)
+    return template, _passage_cache_key(passage), template_hash(STUDY_SYSTEM_MESSAGE, template, rubric_type)
+
+
+def _new_llm_session(session_id: str, system_message: str):
+    # Initialiser le chat avec Gemini Flash
+    return LlmChat(
+        api_key=EMERGENT_LLM_KEY,
+        session_id=session_id,
+        system_message=system_message
+    ).with_model(LLM_PROVIDER, LLM_MODEL)
+
+
+# Sessions LLM réutilisées d'un appel à l'autre (une par appel en cours, par message système et modèle)
+llm_sessions = LlmSessionPool(
+    _new_llm_session, max_idle=LLM_POOL_MAX_IDLE, max_uses=LLM_SESSION_MAX_USES, prefix="bible_study"
+)
+
+
+@asynccontextmanager
+async def llm_session(system_message: str):
+    async with llm_sessions.session(system_message, scope=(LLM_PROVIDER, LLM_MODEL)) as chat:
+        yield MeteredChat(chat)
+
+
+# Appels LLM, lectures du cache et replis de chaque requête, agrégés par route
+llm_accounting = LlmUsageTracker(
+    windows=LLM_METRICS_WINDOWS,
+    max_requests=LLM_METRICS_MAX_REQUESTS,
+    input_price_per_mtok=LLM_PRICE_INPUT_PER_MTOK,
+    output_price_per_mtok=LLM_PRICE_OUTPUT_PER_MTOK,
+)
+
+
+# Plafond de concurrence adaptatif partagé par tous les appels au fournisseur LLM
+llm_limiter = AdaptiveConcurrencyLimiter(
+    "llm",
+    initial=LLM_CONCURRENCY,
+    min_limit=LLM_CONCURRENCY_MIN,
+    max_limit=LLM_CONCURRENCY_MAX,
+    latency_target=LLM_STUDY_LATENCY_TARGET,
+    max_wait=LLM_LIMIT_MAX_WAIT,
+)
+
+
+def _gemini_fallback_text(passage: str, base_content: str, error: Exception) -> str:
+    error_msg = str(error)
+    print(f"❌ Erreur Gemini Flash: {error}")
+    note_fallback()
+    # Si c'est une erreur SSL/TLS, ne pas l'afficher à l'utilisateur
+    if "SSL" in error_msg or "TLS" in error_msg or "EOF" in error_msg or "ssl.c" in error_msg:
+        print(f"🔄 SSL/TLS error detected, using fallback mode silently")
+        return base_content if base_content else f"Contenu théologique pour {passage} (mode local)"
+    return base_content if base_content else f"Contenu théologique pour {passage} (mode fallback)"
+
+
+async def generate_enhanced_content_with_gemini(passage: str, rubric_type: str, base_content: str = "") -> str:
+    """
+    Utilise Google Gemini Flash pour enrichir le contenu théologique
+    """
+    template, cache_key, template_id = _enhanced_cache_slot(passage, rubric_type)
+    cached = explanation_cache.get(*cache_key, LLM_MODEL_ID, [template_id])
+    if cached is not None:
+        note_cache_hit()
+        return cached
+
+    if not GEMINI_AVAILABLE or not EMERGENT_LLM_KEY:
+        print("⚠️ Gemini not available, using base content")
+        note_fallback()
+        return base_content
+    
+    try:
+        # Créer le prompt selon le type de rubrique
+        prompt = template.format(passage=passage, rubric_type=rubric_type)
         
         # Envoyer le message à Gemini
         user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
+        async with llm_limiter.slot(), llm_session(STUDY_SYSTEM_MESSAGE) as chat:
+            response = await chat.send_message(user_message)
         
         print(f"✅ Gemini Flash generated {len(response)} characters for {passage}")
+        explanation_cache.put(*cache_key, LLM_MODEL_ID, template_id, response)
         return response
         
     except Exception as e:
-        error_msg = str(e)
-        print(f"❌ Erreur Gemini Flash: {e}")
-        # Si c'est une erreur SSL/TLS, ne pas l'afficher à l'utilisateur
-        if "SSL" in error_msg or "TLS" in error_msg or "EOF" in error_msg or "ssl.c" in error_msg:
-            print(f"🔄 SSL/TLS error detected, using fallback mode silently")
-            return base_content if base_content else f"Contenu théologique pour {passage} (mode local)"
-        return base_content if base_content else f"Contenu théologique pour {passage} (mode fallback)"
+        return _gemini_fallback_text(passage, base_content, e)
+
+
+async def _stream_llm_reply(chat, message) -> AsyncIterator[str]:
+    """Réponse du modèle morceau par morceau si le client LLM sait streamer, sinon en un seul morceau"""
+    stream_message = getattr(chat, "stream_message", None)
+    if stream_message is None:
+        yield await chat.send_message(message)
+        return
+    async for chunk in stream_message(message):
+        if chunk:
+            yield chunk
+
+
+async def stream_enhanced_content_with_gemini(passage: str, rubric_type: str) -> AsyncIterator[str]:
+    """
+    Variante en flux de generate_enhanced_content_with_gemini : les morceaux sont transmis dès
+    leur arrivée ; la réponse complète est mise en cache à la fin.
+    Une erreur avant le premier morceau donne le même texte de repli que la version non streamée.
+    """
+    template, cache_key, template_id = _enhanced_cache_slot(passage, rubric_type)
+    cached = explanation_cache.get(*cache_key, LLM_MODEL_ID, [template_id])
+    if cached is not None:
+        note_cache_hit()
+        yield cached
+        return
+
+    if not GEMINI_AVAILABLE or not EMERGENT_LLM_KEY:
+        print("⚠️ Gemini not available, using base content")
+        return
+
+    parts: List[str] = []
+    try:
+        prompt = template.format(passage=passage, rubric_type=rubric_type)
+        async with llm_limiter.slot(), llm_session(STUDY_SYSTEM_MESSAGE) as chat:
+            async for chunk in _stream_llm_reply(chat, UserMessage(text=prompt)):
+                parts.append(chunk)
+                yield chunk
+    except Exception as e:
+        if parts:
+            raise
+        yield _gemini_fallback_text(passage, "", e)
+        return
+
+    response = "".join(parts)
+    print(f"✅ Gemini Flash streamed {len(response)} characters for {passage}")
+    explanation_cache.put(*cache_key, LLM_MODEL_ID, template_id, response)
+
+
+# --- Étude en 28 rubriques, un appel par rubrique ---
+# Demander 3 rubriques coûte 3 petits appels au lieu du grand prompt ; chaque rubrique a sa propre
+# entrée dans le cache, réutilisée quelle que soit la sélection demandée ensuite.
+RUBRIC_PROMPT_TEMPLATE = """
+Pour le passage biblique : {passage}
+
+Rédige uniquement la rubrique {number} d'une étude biblique en 28 rubriques : « {title} ».
+Attendu : {hint}
+
+Ne répète pas le titre de la rubrique. Le contenu doit être substantiel (150-250 mots) et adapté spécifiquement au passage {passage}.
+"""
+# Consigne de chaque rubrique (numéro 1..28), reprise du prompt en 28 rubriques
+RUBRIC_PROMPT_HINTS: Dict[int, str] = {
+    int(number): hint
+    for number, hint in re.findall(r"^## (\d+)\. .+\n\[(.+)\]$", ENHANCED_PROMPTS["thematic_study"], re.M)
+}
+
+
+def requested_rubric_indices(requested: Optional[List[int]]) -> List[int]:
+    """Index valides (0..27) dans l'ordre demandé, sans doublons ; toutes les rubriques si aucun"""
+    indices = list(dict.fromkeys(i for i in requested or [] if 0 <= i < len(RUBRIQUES_28)))
+    return indices or list(range(len(RUBRIQUES_28)))
+
+
+def use_per_rubric_study(requested: Optional[List[int]]) -> bool:
+    if LLM_STUDY_MODE == "per_rubric":
+        return True
+    if LLM_STUDY_MODE == "single":
+        return False
+    return len(requested_rubric_indices(requested)) < len(RUBRIQUES_28)
+
+
+def _rubric_heading(index: int) -> str:
+    return f"## {index + 1}. {RUBRIQUES_28[index]}"
+
+
+def _split_rubric_sections(content: str) -> Dict[int, str]:
+    """Corps des sections '## n. Titre' d'une étude, par index de rubrique (n - 1)"""
+    sections: Dict[int, str] = {}
+    parts = re.split(r"^## (\d+)\. [^\n]*$", content, flags=re.M)
+    for number, body in zip(parts[1::2], parts[2::2]):
+        sections[int(number) - 1] = body.strip()
+    return sections
+
+
+async def generate_rubric_with_gemini(passage: str, index: int, base_content: str = "") -> str:
+    """Contenu d'une rubrique (sans son titre), en cache par rubrique ; base_content en cas d'échec"""
+    title = RUBRIQUES_28[index]
+    hint = RUBRIC_PROMPT_HINTS.get(index + 1, title)
+    cache_key = _passage_cache_key(passage)
+    template_id = template_hash(STUDY_SYSTEM_MESSAGE, RUBRIC_PROMPT_TEMPLATE, title, hint)
+    cached = explanation_cache.get(*cache_key, LLM_MODEL_ID, [template_id])
+    if cached is not None:
+        note_cache_hit()
+        return cached
+
+    if not GEMINI_AVAILABLE or not EMERGENT_LLM_KEY:
+        note_fallback()
+        return base_content
+
+    try:
+        prompt = RUBRIC_PROMPT_TEMPLATE.format(passage=passage, number=index + 1, title=title, hint=hint)
+        async with llm_limiter.slot(), llm_session(STUDY_SYSTEM_MESSAGE) as chat:
+            response = (await chat.send_message(UserMessage(text=prompt))).strip()
+    except Exception as e:
+        return _gemini_fallback_text(passage, base_content, e)
+
+    explanation_cache.put(*cache_key, LLM_MODEL_ID, template_id, response)
+    return response
+
+
+async def iter_rubrics_with_gemini(
+    passage: str, indices: List[int], base_sections: Optional[Dict[int, str]] = None
+) -> AsyncIterator[Tuple[int, str]]:
+    """
+    (index, section '## n. Titre' + contenu) dans l'ordre de `indices`.
+    Toutes les rubriques partent en parallèle, au plus LLM_RUBRIC_CONCURRENCY à la fois pour cette étude.
+    """
+    base_sections = base_sections or {}
+    window = asyncio.Semaphore(max(1, LLM_RUBRIC_CONCURRENCY))
+
+    async def one(index: int) -> str:
+        async with window:
+            return await generate_rubric_with_gemini(passage, index, base_sections.get(index, ""))
+
+    tasks = [asyncio.create_task(one(index)) for index in indices]
+    try:
+        for index, task in zip(indices, tasks):
+            yield index, f"{_rubric_heading(index)}\n\n{await task}"
+    finally:
+        # Client parti ou erreur : on n'attend pas les rubriques restantes
+        for task in tasks:
+            task.cancel()
+
+
+async def generate_rubrics_with_gemini(
+    passage: str, requested: Optional[List[int]], base_content: str = ""
+) -> str:
+    """Étude assemblée rubrique par rubrique, dans l'ordre demandé"""
+    indices = requested_rubric_indices(requested)
+    base_sections = _split_rubric_sections(base_content)
+    sections = [section async for _, section in iter_rubrics_with_gemini(passage, indices, base_sections)]
+    print(f"✅ Gemini Flash generated {len(indices)} rubrics for {passage}")
+    return "\n\n".join(sections)
+
+
+async def stream_rubrics_with_gemini(passage: str, requested: Optional[List[int]]) -> AsyncIterator[str]:
+    """Variante en flux : chaque rubrique part dès qu'elle et celles qui la précèdent sont prêtes"""
+    separator = ""
+    async for _, section in iter_rubrics_with_gemini(passage, requested_rubric_indices(requested)):
+        yield separator + section
+        separator = "\n\n"
 
 # =========================
 #      SCHEMAS
@@ -232,6 +610,13 @@ class StudyRequest(BaseModel):
     requestedRubriques: Optional[List[int]] = Field(
         None, description="Index des rubriques à produire (0..27). None = toutes."
     )
+    use_gemini: bool = Field(False, description="Enrichir le contenu avec Gemini Flash.")
+
+
+class JobRequest(StudyRequest):
+    kind: str = Field(
+        "verse_by_verse", description="verse_by_verse | study | verse_by_verse_gemini | study_gemini"
+    )
 
 
 class VerseByVerseRequest(BaseModel):
@@ -239,6 +624,11 @@ class VerseByVerseRequest(BaseModel):
     version: str = Field("", description="Ignoré (api.bible).")
 
 
+class ExplanationPurgeRequest(BaseModel):
+    passage: Optional[str] = Field(None, description="Ex: 'Jean', 'Jean 3' ou 'Jean 3:16'")
+    model: Optional[str] = Field(None, description="Ex: 'gemini/gemini-2.0-flash'")
+
+
 # =========================
 #  OUTILS livres → OSIS
 # =========================
@@ -270,7 +660,7 @@ BOOKS_FR_OSIS: Dict[str, str] = {
     "esaie": "ISA", "jeremie": "JER", "lamentations": "LAM",
     "ezechiel": "EZK", "daniel": "DAN",
     # Prophètes mineurs
-    "osee": "HOS", "joel": "JOL", "amos": "AMO", "abdi": "OBA",
+    "osee": "HOS", "joel": "JOL", "amos": "AMO", "abdias": "OBA", "abdi": "OBA",
     "jonas": "JON", "michee": "MIC", "nahum": "NAM", "habakuk": "HAB",
     "sophonie": "ZEP", "aggée": "HAG", "aggee": "HAG", "zacharie": "ZEC", "malachie": "MAL",
     # Évangiles & Actes
@@ -301,6 +691,105 @@ def headers() -> Dict[str, str]:
         raise HTTPException(status_code=500, detail="BIBLE_API_KEY manquante.")
     return {"api-key": BIBLE_API_KEY}
 
+api_breaker = CircuitBreaker("api.bible", failure_threshold=API_BREAKER_FAILURES, reset_timeout=API_BREAKER_RESET)
+api_latency = LatencyTracker()
+api_limiter = TokenBucketLimiter(
+    rate=API_RATE_PER_SEC, burst=API_RATE_BURST, max_wait=API_RATE_MAX_WAIT, max_queue=API_RATE_MAX_QUEUE
+)
+api_counters = {"hedges_sent": 0, "hedges_won": 0, "hedges_skipped": 0, "stale_served": 0}
+
+
+def _hedge_delay() -> Optional[float]:
+    """Délai avant la seconde tentative : le p95 observé (une fois assez d'échantillons)"""
+    if not API_HEDGE_ENABLED or len(api_latency) < 20:
+        return None
+    return max(API_HEDGE_MIN_DELAY, api_latency.percentile(95) or 0.0)
+
+
+async def api_bible_get(path: str, what: str, params: Optional[Dict[str, str]] = None, timeout: float = 30.0) -> Any:
+    """
+    GET JSON sur api.bible à travers le cache à deux niveaux (mémoire + disque).
+    Entrée fraîche : aucun appel réseau. Entrée expirée : revalidation If-None-Match (304 = réutilisée).
+    Disjoncteur ouvert ou amont en échec : l'entrée expirée est servie si elle existe (textes immuables).
+    Chaque envoi passe par le seau à jetons ; un 429 suspend le seau (Retry-After) puis l'appel est retenté.
+    """
+    url = f"{API_BASE}{path}"
+    key = f"{path}?{urlencode(sorted((params or {}).items()))}"
+    cached = api_cache.get(key)
+    if cached is not None and api_cache.is_fresh(cached):
+        return json.loads(cached.body)
+
+    def _stale_or_raise(status: int, detail: str) -> Any:
+        if cached is not None:
+            api_counters["stale_served"] += 1
+            return json.loads(cached.body)
+        raise HTTPException(status_code=status, detail=f"api.bible {what}: {detail}")
+
+    if not api_breaker.allow():
+        return _stale_or_raise(503, "service indisponible (circuit ouvert)")
+    if stage_timeout(timeout) <= 0:
+        api_breaker.release()
+        return _stale_or_raise(504, "budget de latence épuisé")
+
+    req_headers = headers()
+    if cached is not None and cached.etag:
+        req_headers = {**req_headers, "If-None-Match": cached.etag}
+
+    async def _attempt() -> httpx.Response:
+        call_timeout = stage_timeout(timeout)
+        if call_timeout <= 0:
+            raise httpx.TimeoutException("budget de latence épuisé")
+        started = time.perf_counter()
+        resp = await http_pool.get(url, headers=req_headers, params=params, timeout=call_timeout)
+        api_latency.record(time.perf_counter() - started)
+        return resp
+
+    def _hedge_token() -> bool:
+        # La couverture ne fait jamais la queue : sans jeton immédiat (quota tendu), pas de seconde tentative
+        if api_limiter.try_acquire():
+            return True
+        api_counters["hedges_skipped"] += 1
+        return False
+
+    r: Optional[httpx.Response] = None
+    for _ in range(2):
+        try:
+            # Un jeton du seau par requête réellement envoyée ; l'attente dans la file précède
+            # le délai de couverture au lieu d'y être comptée
+            await api_limiter.acquire(max_wait=min(API_RATE_MAX_WAIT, stage_timeout(timeout)))
+            r, hedge_sent, hedge_won = await hedged(_attempt, _hedge_delay(), can_hedge=_hedge_token)
+        except asyncio.CancelledError:
+            api_breaker.release()
+            raise
+        except RateLimitTimeout as e:
+            api_breaker.release()
+            return _stale_or_raise(503, str(e))
+        except httpx.HTTPError as e:
+            api_breaker.record_failure()
+            status = 504 if isinstance(e, httpx.TimeoutException) else 502
+            return _stale_or_raise(status, f"{type(e).__name__} {e}")
+        api_counters["hedges_sent"] += int(hedge_sent)
+        api_counters["hedges_won"] += int(hedge_won)
+        if r.status_code != 429:
+            break
+        # Quota dépassé : le seau entier se met en pause le temps demandé, puis on retente une fois
+        api_limiter.pause(parse_retry_after(r.headers.get("retry-after")))
+    if r.status_code == 429:
+        api_breaker.release()
+        return _stale_or_raise(503, "quota api.bible atteint, réessayer plus tard")
+
+    if r.status_code >= 500:
+        api_breaker.record_failure()
+        return _stale_or_raise(502, r.text)
+    api_breaker.record_success()
+    if r.status_code == 304 and cached is not None:
+        return json.loads(api_cache.revalidated(key, cached).body)
+    if r.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"api.bible {what}: {r.text}")
+    api_cache.put(key, r.text, r.headers.get("etag"))
+    return r.json()
+
+
 _cached_bible_id: Optional[str] = None
 _cached_bible_name: Optional[str] = None
 
@@ -314,66 +803,230 @@ async def get_bible_id() -> str:
         _cached_bible_name = "Darby (config)"
         return _cached_bible_id
 
-    async with httpx.AsyncClient(timeout=20.0) as client:
-        r = await client.get(f"{API_BASE}/bibles", headers=headers())
-        if r.status_code != 200:
-            raise HTTPException(status_code=502, detail=f"api.bible bibles: {r.text}")
-        data = r.json()
-        lst = data.get("data", [])
-        # cherche Darby FR
+    data = await api_bible_get("/bibles", "bibles", timeout=20.0)
+    lst = data.get("data", [])
+    # cherche Darby FR
+    for b in lst:
+        name = (b.get("name") or "") + " " + (b.get("abbreviationLocal") or "")
+        lang = (b.get("language") or {}).get("name", "")
+        if "darby" in name.lower() and ("fr" in lang.lower() or "fra" in lang.lower()):
+            _cached_bible_id = b.get("id")
+            _cached_bible_name = b.get("name")
+            break
+    if not _cached_bible_id:
         for b in lst:
-            name = (b.get("name") or "") + " " + (b.get("abbreviationLocal") or "")
             lang = (b.get("language") or {}).get("name", "")
-            if "darby" in name.lower() and ("fr" in lang.lower() or "fra" in lang.lower()):
+            if "fr" in lang.lower() or "fra" in lang.lower():
                 _cached_bible_id = b.get("id")
                 _cached_bible_name = b.get("name")
                 break
-        if not _cached_bible_id:
-            for b in lst:
-                lang = (b.get("language") or {}).get("name", "")
-                if "fr" in lang.lower() or "fra" in lang.lower():
-                    _cached_bible_id = b.get("id")
-                    _cached_bible_name = b.get("name")
-                    break
-        if not _cached_bible_id:
-            raise HTTPException(status_code=500, detail="Aucune Bible FR trouvée via api.bible.")
+    if not _cached_bible_id:
+        raise HTTPException(status_code=500, detail="Aucune Bible FR trouvée via api.bible.")
     return _cached_bible_id
 
 
 async def list_verses_ids(bible_id: str, osis_book: str, chapter: int) -> List[str]:
+    # Corpus local puis api.bible (numérotation exacte de la Bible servie) ; la table de versification
+    # (numérotation KJV) ne sert qu'en secours, quand api.bible ne répond pas
+    stored = darby_store.verse_numbers(bible_id, osis_book, chapter)
+    if stored:
+        return [f"{osis_book}.{chapter}.{num}" for num in stored]
+
     chap_id = f"{osis_book}.{chapter}"
-    url = f"{API_BASE}/bibles/{bible_id}/chapters/{chap_id}/verses"
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        r = await client.get(url, headers=headers())
-        if r.status_code != 200:
-            raise HTTPException(status_code=502, detail=f"api.bible verses list: {r.text}")
-        data = r.json()
-        return [v["id"] for v in data.get("data", [])]
+    try:
+        data = await api_bible_get(f"/bibles/{bible_id}/chapters/{chap_id}/verses", "verses list")
+    except HTTPException:
+        local_ids = verse_ids(osis_book, chapter)
+        if local_ids:
+            return local_ids
+        raise
+    return [v["id"] for v in data.get("data", [])]
 
 
 async def fetch_verse_text(bible_id: str, verse_id: str) -> str:
-    url = f"{API_BASE}/bibles/{bible_id}/verses/{verse_id}"
+    # Corpus local d'abord (voir ingest_darby.py), réseau seulement en secours
+    key = split_verse_id(verse_id)
+    if key:
+        local = darby_store.get_verse(bible_id, *key)
+        if local is not None:
+            return local
+
     params = {"content-type": "text"}
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        r = await client.get(url, headers=headers(), params=params)
-        if r.status_code != 200:
-            raise HTTPException(status_code=502, detail=f"api.bible verse: {r.text}")
-        data = r.json()
-        content = (data.get("data") or {}).get("content") or ""
-        content = re.sub(r"\s+", " ", content).strip()
-        return content
+    data = await api_bible_get(f"/bibles/{bible_id}/verses/{verse_id}", "verse", params)
+    content = (data.get("data") or {}).get("content") or ""
+    content = re.sub(r"\s+", " ", content).strip()
+    return content
+
+
+# Marqueurs de versets du format "text" d'api.bible : [1], [2], ou [3-4] pour un verset groupé
+_VERSE_MARKER = re.compile(r"\[(\d+)(?:\s*[-–]\s*(\d+))?\]")
+
+
+def parse_chapter_verses(content: str) -> List[Tuple[int, str]]:
+    """
+    Découpe le texte d'un chapitre (avec marqueurs [n]) en versets numérotés.
+    - ignore le texte avant le premier marqueur (titres, en-têtes de chapitre)
+    - n'accepte que des numéros croissants (un crochet numérique dans le texte n'ouvre pas de verset)
+    - un verset groupé [3-4] est rattaché à son premier numéro
+    """
+    verses: List[Tuple[int, str]] = []
+    last_num = 0
+    start_num: Optional[int] = None
+    start_pos = 0
+    for m in _VERSE_MARKER.finditer(content):
+        num = int(m.group(1))
+        if num <= last_num:
+            continue
+        if start_num is not None:
+            verses.append((start_num, content[start_pos:m.start()]))
+        start_num = num
+        start_pos = m.end()
+        last_num = int(m.group(2) or num)
+    if start_num is not None:
+        verses.append((start_num, content[start_pos:]))
+
+    cleaned: List[Tuple[int, str]] = []
+    for num, txt in verses:
+        txt = re.sub(r"\s+", " ", txt.replace("¶", " ")).strip()
+        if txt:
+            cleaned.append((num, txt))
+    return cleaned
+
+
+async def fetch_chapter_verses(bible_id: str, osis_book: str, chapter: int) -> List[Tuple[int, str]]:
+    """Récupère un chapitre entier en UN appel /chapters/{id} avec numéros de versets"""
+    chap_id = f"{osis_book}.{chapter}"
+    params = {
+        "content-type": "text",
+        "include-verse-numbers": "true",
+        "include-titles": "false",
+        "include-notes": "false",
+        "include-chapter-numbers": "false",
+    }
+    data = await api_bible_get(f"/bibles/{bible_id}/chapters/{chap_id}", "chapter", params)
+    content = (data.get("data") or {}).get("content") or ""
+    return parse_chapter_verses(content)
+
+
+async def fetch_verses_parallel(bible_id: str, verse_ids: List[str], concurrency: Optional[int] = None) -> List[str]:
+    """
+    Récupère plusieurs versets en parallèle (sémaphore borné) et les renvoie dans l'ordre de verse_ids.
+    Au premier échec, les requêtes restantes sont annulées et l'erreur est propagée.
+    """
+    if not verse_ids:
+        return []
+    slots = asyncio.Semaphore(max(1, concurrency or VERSE_FETCH_CONCURRENCY))
+
+    async def _one(vid: str) -> str:
+        async with slots:
+            return await fetch_verse_text(bible_id, vid)
+
+    tasks = [asyncio.create_task(_one(vid)) for vid in verse_ids]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        # Échec d'un verset ou annulation de l'appelant : on n'attend pas le reste
+        pending = [t for t in tasks if not t.done()]
+        for t in pending:
+            t.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    # Toutes les erreurs sont lues (pas de "Task exception was never retrieved"), la première est propagée
+    errors = [t.exception() for t in tasks if not t.cancelled()]
+    first_error = next((e for e in errors if e is not None), None)
+    if first_error is not None:
+        raise first_error
+    return [t.result() for t in tasks]
+
+
+async def _fetch_passage_per_verse(bible_id: str, osis_book: str, chapter: int) -> List[Tuple[int, str]]:
+    """Chemin de secours : liste des versets puis un appel par verset (en parallèle borné)"""
+    ids = await list_verses_ids(bible_id, osis_book, chapter)
+    texts = await fetch_verses_parallel(bible_id, ids)
+    return list(enumerate(texts, start=1))
+
+
+# Les lecteurs simultanés d'un même passage partagent un seul chargement
+passage_flight = SingleFlight("passage")
 
 
 async def fetch_passage_text(bible_id: str, osis_book: str, chapter: int, verse: Optional[int] = None) -> str:
+    return await passage_flight.do(
+        (bible_id, osis_book, chapter, verse),
+        lambda: _load_passage_text(bible_id, osis_book, chapter, verse),
+    )
+
+
+async def _load_passage_text(bible_id: str, osis_book: str, chapter: int, verse: Optional[int] = None) -> str:
     if verse:
         verse_id = f"{osis_book}.{chapter}.{verse}"
         return await fetch_verse_text(bible_id, verse_id)
-    ids = await list_verses_ids(bible_id, osis_book, chapter)
-    parts: List[str] = []
-    for idx, vid in enumerate(ids, start=1):
-        txt = await fetch_verse_text(bible_id, vid)
-        parts.append(f"{idx}. {txt}")
-    return "\n".join(parts).strip()
+    verses = darby_store.get_chapter(bible_id, osis_book, chapter)
+    if verses:
+        return "\n".join(f"{num}. {txt}" for num, txt in verses).strip()
+    try:
+        verses = await fetch_chapter_verses(bible_id, osis_book, chapter)
+    except HTTPException as e:
+        print(f"⚠️ Chapter endpoint failed for {osis_book}.{chapter}, per-verse fallback: {e.detail}")
+    if not verses:
+        verses = await _fetch_passage_per_verse(bible_id, osis_book, chapter)
+    return "\n".join(f"{num}. {txt}" for num, txt in verses).strip()
+
+
+# =========================
+#   PRÉCHARGEMENT DES CHAPITRES VOISINS
+# =========================
+prefetcher = Prefetcher(
+    workers=PREFETCH_WORKERS,
+    busy=lambda: http_pool.in_flight + http_pool.waiting >= PREFETCH_BUSY_INFLIGHT,
+)
+
+
+# Explications : file à part (un lot LLM est long, il ne doit pas retarder les textes) qui
+# s'efface quand le plafond adaptatif des appels LLM est atteint
+explanation_prefetcher = Prefetcher(workers=1, max_queue=8, busy=lambda: llm_limiter.saturated)
+
+
+def schedule_neighbour_prefetch(
+    bible_id: str, osis_book: str, chapter: int, previous: bool = False, explanations: bool = False
+) -> None:
+    """
+    Après un chapitre servi : charge en fond le suivant (et le précédent si la rubrique 3 en a besoin).
+    explanations=True (études verset par verset) : génère aussi les explications manquantes du
+    chapitre suivant dans le cache des explications.
+    """
+    targets = [neighbour_chapter(osis_book, chapter, 1)]
+    if previous:
+        targets.append(neighbour_chapter(osis_book, chapter, -1))
+    for target in targets:
+        if target is None:
+            continue
+        osis, chap = target
+        prefetcher.schedule(
+            ("passage", bible_id, osis, chap),
+            lambda osis=osis, chap=chap: fetch_passage_text(bible_id, osis, chap),
+        )
+    if explanations and targets[0] is not None and GEMINI_AVAILABLE and EMERGENT_LLM_KEY:
+        osis, chap = targets[0]
+        explanation_prefetcher.schedule(
+            ("explanations", bible_id, osis, chap),
+            lambda: _warm_chapter_explanations(bible_id, osis, chap),
+        )
+
+
+async def _warm_chapter_explanations(bible_id: str, osis_book: str, chapter: int) -> None:
+    """Remplit le cache des explications d'un chapitre, lot par lot, tant que le LLM a des places libres"""
+    book_name = BOOK_NAMES_FR.get(osis_book, osis_book)
+    text = await fetch_passage_text(bible_id, osis_book, chapter)
+    missing = [(num, txt) for num, txt in _split_numbered_verses(text)
+               if _cached_explanation(book_name, chapter, num) is None]
+    size = max(1, LLM_BATCH_SIZE)
+    for i in range(0, len(missing), size):
+        # Les requêtes des lecteurs passent avant : on s'arrête dès que le plafond LLM est atteint
+        if llm_limiter.saturated:
+            return
+        await generate_batch_theological_explanations(missing[i:i + size], book_name, chapter)
 
 
 # =========================
@@ -427,21 +1080,28 @@ def parse_passage_input(p: str):
     osis = resolve_osis(book)
     if not osis:
         raise HTTPException(status_code=400, detail=f"Livre non reconnu: '{book}'.")
+    # Validation locale : pas d'aller-retour api.bible pour un passage inexistant. Le corpus ingéré
+    # (numérotation Darby) fait foi pour les chapitres qu'il contient. Sans lui, seul l'impossible est
+    # refusé (chapitre au-delà du livre, numéro nul) : les versets des Bibles françaises ne suivent pas
+    # toujours la table KJV (titres des Psaumes), api.bible tranche
+    corpus_id = _cached_bible_id or PREFERRED_BIBLE_ID
+    stored = darby_store.verse_numbers(corpus_id, osis, chapter) if corpus_id else []
+    if not stored and not 1 <= chapter <= max_chapter_count(osis):
+        raise HTTPException(status_code=400, detail=f"{book} ne compte que {max_chapter_count(osis)} chapitres.")
+    if verse is not None:
+        if stored and verse not in stored:
+            raise HTTPException(status_code=400, detail=f"{book} {chapter} ne compte que {stored[-1]} versets.")
+        if verse < 1:
+            raise HTTPException(status_code=400, detail="Les versets sont numérotés à partir de 1.")
+    # Rattache la requête en cours à son passage pour /api/metrics/llm
+    note_passage(f"{osis} {chapter}" + (f":{verse}" if verse else ""))
     return book, osis, chapter, verse
 
 
 # =========================
 #   GÉNÉRATION THÉOLOGIQUE SIMPLE (SANS LLM)
 # =========================
-async def generate_simple_theological_explanation(verse_text: str, book_name: str, chapter: int, verse_num: int) -> str:
-    """
-    Génère une explication théologique spécifique pour chaque verset en utilisant Gemini Flash
-    """
-    # Si Gemini est disponible, générer une explication spécifique
-    if GEMINI_AVAILABLE and EMERGENT_LLM_KEY:
-        try:
-            # Créer un prompt spécifique pour ce verset
-            prompt = f"""
+VERSE_PROMPT_TEMPLATE = """
 Génère une explication théologique spécifique et contextuelle pour ce verset biblique :
 
 **Verset** : {book_name} {chapter}:{verse_num}
@@ -457,21 +1117,50 @@ INSTRUCTIONS :
 
 L'explication doit être unique à ce verset précis et à son contexte dans {book_name} chapitre {chapter}.
 """
+VERSE_TEMPLATE_ID = template_hash(VERSE_SYSTEM_MESSAGE, VERSE_PROMPT_TEMPLATE)
+
+
+def _cached_explanation(book_name: str, chapter: int, verse_num: int) -> Optional[str]:
+    """Explication déjà générée (unitaire ou par lot) pour ce verset et ce modèle"""
+    book_key = resolve_osis(book_name) or book_name
+    cached = explanation_cache.get(book_key, chapter, verse_num, LLM_MODEL_ID, [VERSE_TEMPLATE_ID, BATCH_TEMPLATE_ID])
+    if cached is not None:
+        note_cache_hit()
+    return cached
+
+
+def _store_explanation(book_name: str, chapter: int, verse_num: int, template_id: str, explanation: str) -> None:
+    book_key = resolve_osis(book_name) or book_name
+    explanation_cache.put(book_key, chapter, verse_num, LLM_MODEL_ID, template_id, explanation)
+
+
+async def generate_simple_theological_explanation(verse_text: str, book_name: str, chapter: int, verse_num: int) -> str:
+    """
+    Génère une explication théologique spécifique pour chaque verset en utilisant Gemini Flash
+    """
+    # Explication déjà générée : aucun appel LLM
+    cached = _cached_explanation(book_name, chapter, verse_num)
+    if cached is not None:
+        return cached
+
+    # Si Gemini est disponible, générer une explication spécifique
+    if GEMINI_AVAILABLE and EMERGENT_LLM_KEY:
+        try:
+            # Créer un prompt spécifique pour ce verset
+            prompt = VERSE_PROMPT_TEMPLATE.format(
+                book_name=book_name, chapter=chapter, verse_num=verse_num, verse_text=verse_text
+            )
             
             # Utiliser Gemini pour générer l'explication
-            chat = LlmChat(
-                api_key=EMERGENT_LLM_KEY,
-                session_id=f"verse_explanation_{book_name}_{chapter}_{verse_num}",
-                system_message="Tu es un théologien expert qui génère des explications bibliques spécifiques et contextuelles en français."
-            ).with_model("gemini", "gemini-2.0-flash")
-            
             user_message = UserMessage(text=prompt)
-            response = await chat.send_message(user_message)
+            async with llm_limiter.slot(LLM_VERSE_LATENCY_TARGET), llm_session(VERSE_SYSTEM_MESSAGE) as chat:
+                response = await chat.send_message(user_message)
             
             # Nettoyer la réponse
             explanation = response.strip()
             if len(explanation) > 50:  # Vérifier que la réponse est substantielle
                 print(f"✅ Gemini generated specific explanation for {book_name} {chapter}:{verse_num}")
+                _store_explanation(book_name, chapter, verse_num, VERSE_TEMPLATE_ID, explanation)
                 return explanation
                 
         except Exception as e:
@@ -483,81 +1172,291 @@ L'explication doit être unique à ce verset précis et à son contexte dans {bo
     # Fallback vers le système existant si Gemini échoue
     return _generate_fallback_explanation(verse_text, book_name, chapter, verse_num)
 
+# =========================
+#   GÉNÉRATION PAR LOTS (UN APPEL LLM POUR PLUSIEURS VERSETS)
+# =========================
+BATCH_PROMPT_TEMPLATE = """
+Génère une explication théologique spécifique et contextuelle pour CHACUN des versets suivants de {book_name} chapitre {chapter} :
+
+{listing}
+
+INSTRUCTIONS :
+- Pour chaque verset, 2-3 phrases (150-200 mots maximum), spécifiques à son contenu exact
+- Inclus le contexte historique ou culturel pertinent, sans répéter les autres versets
+- Utilise un langage accessible mais théologiquement riche
+
+FORMAT DE RÉPONSE OBLIGATOIRE :
+Réponds UNIQUEMENT avec un tableau JSON valide, sans texte autour ni bloc de code :
+[{{"verse": <numéro>, "explanation": "<explication>"}}, ...]
+avec exactement une entrée par verset listé.
+"""
+BATCH_TEMPLATE_ID = template_hash(VERSE_SYSTEM_MESSAGE, BATCH_PROMPT_TEMPLATE)
+
+
+def _batch_prompt(verses: List[Tuple[int, str]], book_name: str, chapter: int) -> str:
+    listing = "\n".join(f"{num}. {txt}" for num, txt in verses)
+    return BATCH_PROMPT_TEMPLATE.format(book_name=book_name, chapter=chapter, listing=listing)
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _iter_json_objects(text: str, start: int) -> Iterator[Any]:
+    """Objets JSON complets trouvés à partir de `start` (objets tronqués ou invalides sautés)"""
+    if start == -1:
+        return
+    pos = text.find("{", start)
+    while pos != -1:
+        try:
+            item, end = _JSON_DECODER.raw_decode(text, pos)
+        except ValueError:
+            pos = text.find("{", pos + 1)
+            continue
+        yield item
+        pos = text.find("{", end)
+
+
+def parse_batch_explanations(raw: str, expected: List[int]) -> Dict[int, str]:
+    """
+    Valide la réponse JSON d'un lot et la ramène aux numéros de versets attendus.
+    Tolère un bloc ```json``` ou du texte autour du tableau ; ignore les entrées invalides,
+    hors lot, dupliquées ou trop courtes (elles seront régénérées verset par verset).
+    Les objets sont décodés un par un : une réponse tronquée (plafond de jetons de sortie atteint)
+    garde toutes ses entrées complètes.
+    """
+    wanted = set(expected)
+    result: Dict[int, str] = {}
+    for item in _iter_json_objects(raw, raw.find("[")):
+        if not isinstance(item, dict):
+            continue
+        try:
+            num = int(item.get("verse"))
+        except (TypeError, ValueError):
+            continue
+        explanation = item.get("explanation")
+        if num not in wanted or num in result or not isinstance(explanation, str):
+            continue
+        explanation = explanation.strip()
+        if len(explanation) > 50:  # même seuil que l'explication unitaire
+            result[num] = explanation
+    return result
+
+
+async def generate_batch_theological_explanations(verses: List[Tuple[int, str]], book_name: str, chapter: int) -> Dict[int, str]:
+    """Un seul appel Gemini pour un lot de versets ; renvoie les explications valides par numéro"""
+    if not verses or not (GEMINI_AVAILABLE and EMERGENT_LLM_KEY):
+        return {}
+    first, last = verses[0][0], verses[-1][0]
+    try:
+        async with llm_limiter.slot(), llm_session(VERSE_SYSTEM_MESSAGE) as chat:
+            response = await asyncio.wait_for(
+                chat.send_message(UserMessage(text=_batch_prompt(verses, book_name, chapter))),
+                timeout=stage_timeout(LLM_BATCH_TIMEOUT),
+            )
+    except asyncio.TimeoutError:
+        print(f"⏱️ Gemini batch timed out for {book_name} {chapter}:{first}-{last}, per-verse fallback")
+        return {}
+    except Exception as e:
+        print(f"⚠️ Gemini batch failed for {book_name} {chapter}:{first}-{last}: {e}")
+        return {}
+    explanations = parse_batch_explanations(response, [num for num, _ in verses])
+    for num, explanation in explanations.items():
+        _store_explanation(book_name, chapter, num, BATCH_TEMPLATE_ID, explanation)
+    print(f"✅ Gemini batch {book_name} {chapter}:{first}-{last}: {len(explanations)}/{len(verses)} explanations")
+    return explanations
+
+
+llm_verse_latency = LatencyTracker()
+llm_counters = {"verse_calls": 0, "verse_timeouts": 0, "verse_background": 0,
+                "verse_background_done": 0, "verse_background_dropped": 0}
+# Appels LLM dont la course a été perdue contre le repli local : ils finissent pour remplir le cache
+llm_background: set = set()
+
+
+def _background_finished(task: asyncio.Task, started: float, usage) -> None:
+    llm_background.discard(task)
+    llm_verse_latency.record(time.perf_counter() - started)
+    ok = not task.cancelled() and task.exception() is None
+    if ok:
+        llm_counters["verse_background_done"] += 1
+    if usage is not None:
+        llm_accounting.finish(usage, status=None if ok else 500)
+
+
+async def _explain_verse_bounded(verse_text: str, book_name: str, chapter: int, verse_num: int) -> str:
+    """
+    Explication d'un verset en course contre le repli local.
+    Si le LLM ne répond pas dans le budget (LLM_VERSE_TIMEOUT, borné par celui de la requête,
+    attente d'une place sous le plafond adaptatif comprise), le repli local est renvoyé tout de
+    suite ; l'appel LLM continue en tâche de fond (au plus LLM_BACKGROUND_MAX) et son résultat
+    est écrit dans le cache des explications.
+    """
+    llm_counters["verse_calls"] += 1
+    started = time.perf_counter()
+    # Contexte propre à l'appel : s'il part en fond, sa comptabilité LLM quitte la requête (voir detach)
+    call_context = contextvars.copy_context()
+    call = asyncio.create_task(asyncio.wait_for(
+        generate_simple_theological_explanation(verse_text, book_name, chapter, verse_num),
+        timeout=LLM_BACKGROUND_TIMEOUT,
+    ), context=call_context)
+    try:
+        done, _ = await asyncio.wait({call}, timeout=stage_timeout(LLM_VERSE_TIMEOUT))
+    except asyncio.CancelledError:
+        call.cancel()
+        raise
+    if done:
+        llm_verse_latency.record(time.perf_counter() - started)
+        try:
+            return call.result()
+        except asyncio.TimeoutError:
+            return _generate_fallback_explanation(verse_text, book_name, chapter, verse_num)
+
+    llm_counters["verse_timeouts"] += 1
+    if len(llm_background) < LLM_BACKGROUND_MAX:
+        llm_counters["verse_background"] += 1
+        llm_background.add(call)
+        usage = llm_accounting.detach(call_context)
+        call.add_done_callback(lambda t, t0=started, u=usage: _background_finished(t, t0, u))
+        print(f"⏱️ Explanation budget exceeded for {book_name} {chapter}:{verse_num}, local fallback (LLM continues in background)")
+    else:
+        llm_counters["verse_background_dropped"] += 1
+        call.cancel()
+        print(f"⏱️ Explanation budget exceeded for {book_name} {chapter}:{verse_num}, local fallback")
+    return _generate_fallback_explanation(verse_text, book_name, chapter, verse_num)
+
+
+async def cancel_background_explanations() -> None:
+    for task in list(llm_background):
+        task.cancel()
+    if llm_background:
+        await asyncio.gather(*llm_background, return_exceptions=True)
+
+
+async def iter_chapter_explanations(
+    verses: List[Tuple[int, str]], book_name: str, chapter: int, lookahead: Optional[int] = None
+) -> AsyncIterator[Tuple[int, str]]:
+    """
+    Explications de tous les versets d'un chapitre, produites dans l'ordre des versets dès que
+    chacune est prête.
+    Mode "batch" : un appel par lot de LLM_BATCH_SIZE versets (lots lancés en parallèle), puis repli
+    verset par verset uniquement pour les entrées manquantes ou invalides.
+    Les appels unitaires tournent en parallèle (plafond adaptatif llm_limiter) avec un budget par verset.
+    Sans LLM, le repli local couvre tout le chapitre d'un coup (_generate_fallback_explanations).
+    lookahead : nombre max de versets générés d'avance sur le consommateur (None = pas de limite).
+    """
+    loop = asyncio.get_running_loop()
+    ready: Dict[int, asyncio.Future] = {num: loop.create_future() for num, _ in verses}
+    for num, _ in verses:
+        cached = _cached_explanation(book_name, chapter, num)
+        if cached is not None:
+            ready[num].set_result(cached)
+    uncached = [(num, txt) for num, txt in verses if not ready[num].done()]
+    if uncached and not (GEMINI_AVAILABLE and EMERGENT_LLM_KEY):
+        # Pas de LLM : tout le chapitre en repli local, d'un seul passage (ni tâche ni appel par verset)
+        for num, explanation in _generate_fallback_explanations(uncached, book_name, chapter).items():
+            ready[num].set_result(explanation)
+        uncached = []
+    use_batch = LLM_VERSE_MODE == "batch" and GEMINI_AVAILABLE and EMERGENT_LLM_KEY
+    size = max(1, LLM_BATCH_SIZE) if use_batch else 1
+    # Une place de la fenêtre par verset en cours de génération ou prêt mais pas encore consommé
+    window = asyncio.Semaphore(lookahead) if lookahead else None
+    tasks: List[asyncio.Task] = []
+
+    def fail(err: BaseException, nums) -> None:
+        for num in nums:
+            if not ready[num].done():
+                ready[num].set_exception(err)
+
+    async def explain_one(num: int, txt: str) -> None:
+        try:
+            ready[num].set_result(await _explain_verse_bounded(txt, book_name, chapter, num))
+        except Exception as e:
+            fail(e, [num])
+
+    async def take_chunk(start: int) -> List[Tuple[int, str]]:
+        # Places de la fenêtre prises avant chaque lot : on attend que le consommateur en libère assez
+        # (la moitié de la fenêtre en mode batch, pour éviter une suite de lots d'un verset), puis on
+        # prend celles qui sont libres. Un lot n'est jamais plus grand que la fenêtre disponible
+        limit = min(size, len(uncached) - start)
+        if window is None:
+            return uncached[start:start + limit]
+        wait_for = min(limit, max(1, lookahead // 2)) if use_batch else 1
+        taken = 0
+        while taken < wait_for:
+            await window.acquire()
+            taken += 1
+        while taken < limit and not window.locked():
+            await window.acquire()
+            taken += 1
+        return uncached[start:start + taken]
+
+    async def explain_chunk(chunk: List[Tuple[int, str]]) -> None:
+        try:
+            found = await generate_batch_theological_explanations(chunk, book_name, chapter)
+        except Exception as e:
+            fail(e, [num for num, _ in chunk])
+            return
+        for num, txt in chunk:
+            if num in found:
+                ready[num].set_result(found[num])
+            else:
+                tasks.append(asyncio.create_task(explain_one(num, txt)))
+
+    async def produce() -> None:
+        # Lots et appels unitaires partent en parallèle ; llm_limiter plafonne les appels simultanés
+        try:
+            i = 0
+            while i < len(uncached):
+                chunk = await take_chunk(i)
+                i += len(chunk)
+                if use_batch:
+                    tasks.append(asyncio.create_task(explain_chunk(chunk)))
+                else:
+                    tasks.extend(asyncio.create_task(explain_one(num, txt)) for num, txt in chunk)
+        except Exception as e:
+            fail(e, ready)
+
+    producer = asyncio.create_task(produce())
+    pending = {num for num, _ in uncached}
+    try:
+        for num, _ in verses:
+            explanation = await ready[num]
+            yield num, explanation
+            if window is not None and num in pending:
+                window.release()
+    finally:
+        for t in [producer, *tasks]:
+            if not t.done():
+                t.cancel()
+
+
+async def generate_chapter_explanations(verses: List[Tuple[int, str]], book_name: str, chapter: int) -> Dict[int, str]:
+    """Explications de tous les versets d'un chapitre (voir iter_chapter_explanations)"""
+    return {num: explanation async for num, explanation in iter_chapter_explanations(verses, book_name, chapter)}
+
+
 def _generate_fallback_explanation(verse_text: str, book_name: str, chapter: int, verse_num: int) -> str:
     """
     Génère une explication théologique basée sur l'analyse intelligente du contenu du verset (mode fallback)
+    Règles par livre / chapitre / versets et mots-clés : data/fallback_rules/*.json (voir fallback_rules.py)
     """
-    verse_lower = verse_text.lower()
-    explanation_parts = []
-    
-    # === ANALYSE CONTEXTUELLE PAR LIVRE ET CONTENU SPÉCIFIQUE ===
-    
-    # Genèse - Contexte de création et origines avec plus de spécificité
-    if book_name == "Genèse":
-        if chapter == 1:
-            if verse_num == 1:
-                explanation_parts.append("Ce verset fondamental proclame l'existence éternelle de Dieu et établit le principe de création ex nihilo, révélant Dieu comme la source unique de toute réalité.")
-            elif verse_num in [2,3]:
-                explanation_parts.append("Cette description révèle le processus créateur divin par la parole, démontrant la puissance absolue de Dieu qui transforme le chaos en ordre par son commandement.")
-            elif verse_num == 27:
-                explanation_parts.append("Cette création de l'homme à l'image de Dieu révèle la dignité unique de l'humanité et sa vocation à refléter la gloire divine dans la création.")
-            elif verse_num >= 28:
-                explanation_parts.append("Cette bénédiction divine établit le mandat culturel de l'humanité, révélant sa responsabilité de gérance sur la création sous l'autorité divine.")
-        elif chapter == 2:
-            explanation_parts.append("Ce récit complémentaire révèle la dimension relationnelle de la création et l'intimité originelle entre Dieu et l'humanité dans le jardin d'Éden.")
-        elif chapter == 3:
-            explanation_parts.append("Cette narration de la chute révèle l'origine du mal et l'inauguration du plan de rédemption à travers la promesse messianique.")
-        elif chapter == 6:
-            if "fils de Dieu" in verse_lower or "filles des hommes" in verse_lower:
-                explanation_parts.append("Ce passage controversé révèle la corruption progressive de l'humanité et l'effacement de la distinction entre la lignée pieuse et impie, préparant le jugement du déluge.")
-            elif "mon esprit" in verse_lower or "120 ans" in verse_lower:
-                explanation_parts.append("Cette limitation divine révèle à la fois la patience de Dieu et sa justice, accordant un temps de grâce avant le jugement tout en maintenant ses standards moraux.")
-            elif "géants" in verse_lower or "nephilim" in verse_lower:
-                explanation_parts.append("Cette mention des géants illustre l'ampleur de la corruption qui caractérise l'humanité prédiluvienne, justifiant l'intervention divine radicale du déluge.")
-            elif "méchanceté" in verse_lower or "mal" in verse_lower:
-                explanation_parts.append("Cette évaluation divine révèle l'état de corruption totale du cœur humain, démontrant la nécessité de l'intervention divine pour la rédemption.")
-            elif "repentit" in verse_lower or "affligea" in verse_lower:
-                explanation_parts.append("Cette expression anthropomorphique révèle la douleur divine face au péché, illustrant l'amour de Dieu pour sa création tout en maintenant sa justice.")
-            elif "noé" in verse_lower and "grâce" in verse_lower:
-                explanation_parts.append("Cette découverte de grâce révèle le principe de l'élection divine et de la préservation d'un reste fidèle, préfigurant le salut par grâce.")
-            elif "juste" in verse_lower or "parfait" in verse_lower or "marchait avec dieu" in verse_lower:
-                explanation_parts.append("Cette caractérisation de Noé révèle les qualités requises pour trouver grâce devant Dieu : la justice, l'intégrité et la communion spirituelle.")
-            elif "corruption" in verse_lower or "violence" in verse_lower:
-                explanation_parts.append("Cette description de l'état moral du monde révèle les conséquences de l'éloignement de Dieu : la corruption spirituelle et la violence sociale.")
-            elif "fin de toute chair" in verse_lower or "détruire" in verse_lower:
-                explanation_parts.append("Cette annonce du jugement révèle la justice inexorable de Dieu face au péché, tout en préparant la voie pour un nouveau commencement à travers Noé.")
-            elif "arche" in verse_lower or "bois de gopher" in verse_lower:
-                explanation_parts.append("Ces instructions détaillées révèlent la provision divine de salut au cœur même du jugement, préfigurant l'œuvre rédemptrice du Christ.")
-            else:
-                explanation_parts.append(f"Ce verset du chapitre 6 de la Genèse révèle un aspect important de la condition humaine avant le déluge et de la réponse divine à la corruption.")
-        else:
-            explanation_parts.append(f"Ce passage de Genèse {chapter} révèle les développements du plan divin dans l'histoire des origines.")
-    
-    # Continuer avec les autres livres mais de manière plus spécifique...
-    elif book_name == "Jean":
-        if chapter == 3:
-            if verse_num == 16:
-                explanation_parts.append("Ce verset central de l'Évangile révèle la motivation divine du salut : l'amour, et sa manifestation suprême : le don du Fils unique pour la vie éternelle.")
-            elif verse_num == 3:
-                explanation_parts.append("Cette exigence de nouvelle naissance révèle la nécessité de la régénération spirituelle pour entrer dans le royaume de Dieu.")
-            else:
-                explanation_parts.append(f"Ce verset du dialogue avec Nicodème révèle les conditions et la nature de la vie spirituelle authentique.")
-        else:
-            explanation_parts.append(f"Ce passage de Jean {chapter} révèle la divinité du Christ et les implications pour la foi.")
-    
-    # Si aucune analyse spécifique n'est trouvée, utiliser le contexte général du livre
-    if not explanation_parts:
-        book_contexts = {
-            "Genèse": f"Ce verset du chapitre {chapter} révèle un aspect des origines et du plan divin pour l'humanité.",
-            "Exode": f"Ce passage du chapitre {chapter} illustre l'œuvre libératrice de Dieu et ses implications spirituelles.",
-            "Jean": f"Ce verset du chapitre {chapter} révèle la personne et l'œuvre du Christ pour le salut.",
-            "Romains": f"Cette doctrine du chapitre {chapter} expose les fondements du salut par la foi en Christ."
-        }
-        explanation_parts.append(book_contexts.get(book_name, f"Ce verset révèle un aspect important de la révélation divine dans {book_name} {chapter}."))
-    
-    # Joindre les explications
-    full_explanation = " ".join(explanation_parts)
-    
+    note_fallback()
+    book_key = resolve_osis(book_name) or book_name
+    explanation = fallback_rules.explain(verse_text, book_key, chapter, verse_num, book_label=book_name)
+    return _clean_fallback_explanation(explanation, book_name, chapter)
+
+
+def _generate_fallback_explanations(verses: List[Tuple[int, str]], book_name: str, chapter: int) -> Dict[int, str]:
+    """Repli local pour tous les versets d'un chapitre, en un seul passage sur le texte du chapitre"""
+    note_fallback(len(verses))
+    book_key = resolve_osis(book_name) or book_name
+    explanations = fallback_rules.explain_chapter(verses, book_key, chapter, book_label=book_name)
+    return {num: _clean_fallback_explanation(explanations[num], book_name, chapter) for num, _ in verses}
+
+
+def _clean_fallback_explanation(explanation: Optional[str], book_name: str, chapter: int) -> str:
+    full_explanation = explanation or f"Ce verset révèle un aspect important de la révélation divine dans {book_name} {chapter}."
+
     # Nettoyer le texte
     full_explanation = full_explanation.replace("strong", "").replace("Strong", "")
     full_explanation = ' '.join(full_explanation.split())
@@ -585,6 +1484,58 @@ def format_theological_content(content: str) -> str:
     return content
 
 
+class TheologicalContentFormatter:
+    """
+    format_theological_content appliqué morceau par morceau à un flux de texte.
+    Un mot (ou des espaces) en fin de morceau reste en attente tant que la suite n'est pas connue :
+    la concaténation des sorties est identique à format_theological_content(texte complet).
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._started = False
+
+    @staticmethod
+    def _safe_cut(buf: str) -> int:
+        i = len(buf)
+        # Espaces finaux : retenus (fusion des espaces, strip final)
+        while i > 0 and buf[i - 1].isspace():
+            i -= 1
+        if i < len(buf):
+            return i
+        # Mot final peut-être incomplet ('str' + 'ong') : retenu avec les espaces qui le précèdent
+        while i > 0 and (buf[i - 1].isalnum() or buf[i - 1] == "_"):
+            i -= 1
+        while i > 0 and buf[i - 1].isspace():
+            i -= 1
+        return i
+
+    def _clean(self, segment: str) -> str:
+        segment = re.sub(r'\bstrong\b', '', segment, flags=re.IGNORECASE)
+        segment = re.sub(r'[ ]+', ' ', segment)
+        if not self._started:
+            segment = segment.lstrip()
+            self._started = bool(segment)
+        return segment
+
+    def feed(self, chunk: str) -> str:
+        # Toutes les étoiles disparaissent (marqueurs ** et * isolés)
+        buf = self._pending + chunk.replace('*', '')
+        cut = self._safe_cut(buf)
+        self._pending = buf[cut:]
+        if not cut:
+            return ""
+        # La suppression de 'strong' peut découvrir des espaces finaux : retenus eux aussi
+        out = self._clean(buf[:cut])
+        kept = out.rstrip()
+        self._pending = out[len(kept):] + self._pending
+        return kept
+
+    def flush(self) -> str:
+        tail, self._pending = self._pending, ""
+        return self._clean(tail).rstrip()
+
+
 def generate_intelligent_rubric_content(rubric_num: int, book_name: str, chapter: int, text: str, historical_context: str = "", cross_refs = None) -> str:
     """
     Génère un contenu intelligent pour une rubrique spécifique basé sur le contexte théologique
@@ -668,6 +1619,65 @@ async def health_check():
         "intelligent_mode": INTELLIGENT_MODE
     }
 
+@app.get("/api/metrics")
+async def metrics():
+    """Compteurs internes (pool HTTP, corpus local, cache api.bible) pour dimensionner le service sous charge"""
+    return {
+        "http_pool": http_pool.stats(),
+        "darby_store": darby_store.stats(),
+        "api_cache": api_cache.stats(),
+        "explanation_cache": explanation_cache.stats(),
+        "fallback_rules": fallback_rules.stats(),
+        "passage_singleflight": passage_flight.stats(),
+        "prefetch": prefetcher.stats(),
+        "explanation_prefetch": explanation_prefetcher.stats(),
+        "jobs": job_queue.stats(),
+        "api_bible": {
+            "circuit": api_breaker.stats(),
+            "latency": api_latency.stats(),
+            "rate_limiter": api_limiter.stats(),
+            **api_counters,
+        },
+        "llm": {
+            "concurrency": llm_limiter.stats(),
+            "verse_latency": llm_verse_latency.stats(),
+            "sessions": llm_sessions.stats(),
+            "verse_background_in_flight": len(llm_background),
+            **llm_counters,
+        },
+    }
+
+
+@app.get("/api/metrics/llm")
+async def metrics_llm():
+    """Appels, jetons estimés, coût, cache, replis et latences LLM par route, sur fenêtres glissantes"""
+    return llm_accounting.stats()
+
+# =========================
+#   ADMINISTRATION
+# =========================
+def _require_admin(token: Optional[str]) -> None:
+    if not ADMIN_TOKEN or token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Accès administrateur refusé.")
+
+@app.post("/api/admin/cache/explanations/purge")
+async def purge_explanations(req: ExplanationPurgeRequest, x_admin_token: Optional[str] = Header(None)):
+    """Supprime les explications générées d'un passage (livre, chapitre ou verset) et/ou d'un modèle"""
+    _require_admin(x_admin_token)
+    if not req.passage and not req.model:
+        raise HTTPException(status_code=400, detail="Préciser 'passage' et/ou 'model'.")
+
+    book = chapter = verse = None
+    if req.passage:
+        # Livre seul ('Jean', '1 Jean') ou passage ('Jean 3', 'Jean 3:16')
+        book = resolve_osis(req.passage)
+        if not book:
+            _, book, chapter, verse = parse_passage_input(req.passage)
+
+    deleted = explanation_cache.purge(book=book, chapter=chapter, verse=verse, model=req.model)
+    print(f"🧹 Explanation cache purge {req.passage or '*'} / {req.model or '*'}: {deleted} entries")
+    return {"deleted": deleted, "book": book, "chapter": chapter, "verse": verse, "model": req.model}
+
 # =========================
 #   ROUTES PROXY pour contourner CORS
 # =========================
@@ -680,20 +1690,34 @@ async def test_connection():
 async def proxy_verse_by_verse(req: VerseByVerseRequest):
     """Proxy vers l'API externe etude8-bible-api-production.up.railway.app"""
     try:
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                "https://etude8-bible-api-production.up.railway.app/api/generate-verse-by-verse",
-                headers={"Content-Type": "application/json"},
-                json={"passage": req.passage, "version": req.version}
-            )
-            if response.status_code == 200:
-                return response.json()
-            else:
-                raise HTTPException(status_code=response.status_code, detail=response.text)
+        response = await http_pool.post(
+            "https://etude8-bible-api-production.up.railway.app/api/generate-verse-by-verse",
+            headers={"Content-Type": "application/json"},
+            json={"passage": req.passage, "version": req.version},
+            timeout=120.0
+        )
+        if response.status_code == 200:
+            return response.json()
+        else:
+            raise HTTPException(status_code=response.status_code, detail=response.text)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur proxy verse-by-verse: {str(e)}")
 
 
+@app.post("/api/generate-verse-by-verse/stream")
+async def generate_verse_by_verse_stream(request: VerseByVerseRequest):
+    """
+    Variante en flux (Server-Sent Events) : titre et introduction tout de suite,
+    puis un événement par verset dès qu'il est prêt, et un résumé final.
+    """
+    if not request.passage.strip():
+        raise HTTPException(status_code=400, detail="Passage requis")
+    # Erreurs de saisie (livre inconnu, chapitre hors limites) : vraie 400 avant l'ouverture du flux
+    parse_passage_input(request.passage)
+    events = with_keepalive(_stream_verse_by_verse_events(request), SSE_KEEPALIVE_SECONDS)
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @app.post("/api/generate-verse-by-verse")
 async def generate_verse_by_verse(request: StudyRequest):
     """
@@ -701,7 +1725,7 @@ async def generate_verse_by_verse(request: StudyRequest):
     """
     try:
         passage = request.passage.strip()
-        use_gemini = getattr(request, 'use_gemini', False)  # Nouveau paramètre optionnel
+        use_gemini = request.use_gemini
         
         if not passage:
             raise HTTPException(status_code=400, detail="Passage requis")
@@ -725,52 +1749,116 @@ async def generate_verse_by_verse(request: StudyRequest):
         print(f"❌ Erreur generate_verse_by_verse: {e}")
         return {"content": f"Erreur lors de la génération: {str(e)}"}
 
-async def _generate_verse_by_verse_content(req):
-    """Génère le contenu verset par verset de base"""
-    book_label, osis, chap, verse = parse_passage_input(req.passage)
-    bible_id = await get_bible_id()
-    text = await fetch_passage_text(bible_id, osis, chap, verse)
-
+def _verse_by_verse_heading(book_label: str, chap: int) -> Tuple[str, str]:
     title = f"**Étude Verset par Verset - {book_label} Chapitre {chap}**"
     intro = (
         "Introduction au Chapitre\n\n"
         "Cette étude parcourt le texte de la **Bible Darby (FR)**. "
         "Les sections *EXPLICATION THÉOLOGIQUE* sont générées automatiquement par IA théologique."
     )
+    return title, intro
+
+
+def _verse_block(vnum: int, vtxt: str, theological_explanation: str) -> str:
+    return (
+        f"**VERSET {vnum}**\n\n"
+        f"**TEXTE BIBLIQUE :**\n{vtxt}\n\n"
+        f"**EXPLICATION THÉOLOGIQUE :**\n{theological_explanation}"
+    )
+
+
+def _split_numbered_verses(text: str) -> List[Tuple[int, str]]:
+    """'1. texte' par ligne → [(1, 'texte'), ...]"""
+    verses: List[Tuple[int, str]] = []
+    for line in text.splitlines():
+        m = re.match(r"^(\d+)\.\s*(.*)$", line.strip())
+        if m:
+            verses.append((int(m.group(1)), m.group(2).strip()))
+    return verses
+
+
+async def _generate_verse_by_verse_content(req):
+    """Génère le contenu verset par verset de base"""
+    book_label, osis, chap, verse = parse_passage_input(req.passage)
+    bible_id = await get_bible_id()
+    text = await fetch_passage_text(bible_id, osis, chap, verse)
+    if not verse:
+        schedule_neighbour_prefetch(bible_id, osis, chap, explanations=True)
+
+    title, intro = _verse_by_verse_heading(book_label, chap)
 
     if verse:
         # Générer l'explication théologique pour le verset unique
-        theological_explanation = await generate_simple_theological_explanation(text, book_label, chap, verse)
+        theological_explanation = await _explain_verse_bounded(text, book_label, chap, verse)
         theological_explanation = format_theological_content(theological_explanation)
-        content = (
-            f"**{title}**\n\n{intro}\n\n"
-            f"**VERSET {verse}**\n\n"
-            f"**TEXTE BIBLIQUE :**\n{text}\n\n"
-            f"**EXPLICATION THÉOLOGIQUE :**\n{theological_explanation}"
-        )
+        content = f"**{title}**\n\n{intro}\n\n" + _verse_block(verse, text, theological_explanation)
         return {"content": format_theological_content(content)}
 
     # Pour un chapitre entier, parser les versets et générer les explications
-    lines = [l for l in text.splitlines() if l.strip()]
+    verses = _split_numbered_verses(text)
+    explanations = await generate_chapter_explanations(verses, book_label, chap)
     blocks: List[str] = [f"**{title}**\n\n{intro}"]
-    
-    for line in lines:
-        m = re.match(r"^(\d+)\.\s*(.*)$", line)
-        if not m:
-            continue
-        vnum = int(m.group(1))
-        vtxt = m.group(2).strip()
-        
-        # Générer l'explication théologique pour CHAQUE verset
-        theological_explanation = await generate_simple_theological_explanation(vtxt, book_label, chap, vnum)
-        
-        blocks.append(
-            f"**VERSET {vnum}**\n\n"
-            f"**TEXTE BIBLIQUE :**\n{vtxt}\n\n"
-            f"**EXPLICATION THÉOLOGIQUE :**\n{theological_explanation}"
-        )
+    for vnum, vtxt in verses:
+        blocks.append(_verse_block(vnum, vtxt, explanations[vnum]))
     return {"content": format_theological_content("\n\n".join(blocks).strip())}
 
+
+async def _single_verse_explanation(text: str, book_label: str, chap: int, verse: int) -> AsyncIterator[Tuple[int, str]]:
+    yield verse, await _explain_verse_bounded(text, book_label, chap, verse)
+
+
+async def _stream_verse_by_verse_events(req) -> AsyncIterator[str]:
+    """
+    Événements SSE d'une étude verset par verset :
+    'meta' (titre + introduction, immédiatement), un 'verse' par verset dans l'ordre, puis 'done'.
+    Une erreur après l'ouverture du flux est signalée par un événement 'error'.
+    """
+    started = time.perf_counter()
+    book_label, osis, chap, verse = parse_passage_input(req.passage)
+    title, intro = _verse_by_verse_heading(book_label, chap)
+    yield sse_event("meta", {
+        "passage": req.passage,
+        "title": format_theological_content(title),
+        "intro": format_theological_content(intro),
+        "content": format_theological_content(f"**{title}**\n\n{intro}"),
+    })
+
+    count = 0
+    try:
+        bible_id = await get_bible_id()
+        text = await fetch_passage_text(bible_id, osis, chap, verse)
+        if verse:
+            explanations = _single_verse_explanation(text, book_label, chap, verse)
+            verses = [(verse, text)]
+        else:
+            schedule_neighbour_prefetch(bible_id, osis, chap, explanations=True)
+            verses = _split_numbered_verses(text)
+            explanations = iter_chapter_explanations(verses, book_label, chap, lookahead=SSE_LOOKAHEAD_VERSES)
+        texts = dict(verses)
+        async for vnum, theological_explanation in explanations:
+            count += 1
+            theological_explanation = format_theological_content(theological_explanation)
+            yield sse_event("verse", {
+                "verse": vnum,
+                "text": texts[vnum],
+                "explanation": theological_explanation,
+                "content": format_theological_content(_verse_block(vnum, texts[vnum], theological_explanation)),
+            }, event_id=str(vnum))
+    except HTTPException as e:
+        yield sse_event("error", {"status": e.status_code, "detail": e.detail})
+        return
+    except Exception as e:
+        print(f"❌ Verse-by-verse stream failed for {req.passage}: {e}")
+        yield sse_event("error", {"status": 500, "detail": f"Erreur génération: {e}"})
+        return
+
+    yield sse_event("done", {
+        "passage": req.passage,
+        "verses": count,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    })
+
+
 def generate_intelligent_rubric_content(rubric_index: int, book: str, chapter: int, 
                                        verse_text: str, historical_context: str, cross_refs: list) -> str:
     """Génère le contenu intelligent pour une rubrique spécifique"""
@@ -890,31 +1978,42 @@ async def generate_study(request: StudyRequest):
     Génère une étude biblique avec système intelligent + option Gemini Flash
     """
     try:
-        passage = request.passage.strip()
-        use_gemini = getattr(request, 'use_gemini', False)  # Nouveau paramètre optionnel
-        
-        if not passage:
-            raise HTTPException(status_code=400, detail="Passage requis")
-        
-        # Générer le contenu de base avec le système intelligent existant
-        base_response = await _generate_intelligent_study(request)
-        
-        # Si Gemini est demandé, enrichir le contenu
-        if use_gemini and GEMINI_AVAILABLE:
-            print(f"🚀 Enhancing with Gemini Flash for {passage}")
-            enhanced_content = await generate_enhanced_content_with_gemini(
-                passage=passage,
-                rubric_type="thematic_study",
-                base_content=base_response.get("content", "")
-            )
-            return {"content": enhanced_content}
-        else:
-            return base_response
-            
+        return await _compose_study(request)
     except Exception as e:
         print(f"❌ Erreur generate_study: {e}")
         return {"content": f"Erreur lors de la génération: {str(e)}"}
 
+
+async def _compose_study(request: StudyRequest):
+    """Corps de /api/generate-study ; les erreurs remontent (les travaux asynchrones les marquent en échec)"""
+    passage = request.passage.strip()
+    use_gemini = request.use_gemini
+
+    if not passage:
+        raise HTTPException(status_code=400, detail="Passage requis")
+
+    # Générer le contenu de base avec le système intelligent existant
+    base_response = await _generate_intelligent_study(request)
+
+    # Si Gemini est demandé, enrichir le contenu
+    if use_gemini and GEMINI_AVAILABLE and use_per_rubric_study(request.requestedRubriques):
+        print(f"🚀 Enhancing rubric by rubric with Gemini Flash for {passage}")
+        enhanced_content = await generate_rubrics_with_gemini(
+            passage, request.requestedRubriques, base_content=base_response.get("content", "")
+        )
+        return {"content": enhanced_content}
+    elif use_gemini and GEMINI_AVAILABLE:
+        print(f"🚀 Enhancing with Gemini Flash for {passage}")
+        enhanced_content = await generate_enhanced_content_with_gemini(
+            passage=passage,
+            rubric_type="thematic_study",
+            base_content=base_response.get("content", "")
+        )
+        return {"content": enhanced_content}
+    else:
+        return base_response
+
+
 async def _generate_intelligent_study(req: StudyRequest):
     """
     Étude '28 rubriques' INTELLIGENTE avec contenu contextualisé.
@@ -931,6 +2030,8 @@ async def _generate_intelligent_study(req: StudyRequest):
     # Filtre des rubriques
     rubs = RUBRIQUES_28
     requested_indices = req.requestedRubriques or list(range(len(RUBRIQUES_28)))
+    # La rubrique 3 "Questions du chapitre précédent" s'appuie sur le chapitre d'avant
+    schedule_neighbour_prefetch(bible_id, osis, chap, previous=2 in requested_indices)
     
     if req.requestedRubriques:
         rubs = [RUBRIQUES_28[i] for i in req.requestedRubriques if 0 <= i < len(RUBRIQUES_28)]
@@ -988,13 +2089,13 @@ async def _generate_intelligent_study(req: StudyRequest):
 async def verse_proxy_to_railway(req: StudyRequest):
     """Proxy vers etude8-bible-api Railway pour éviter CORS"""
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(
-                "https://etude8-bible-api-production.up.railway.app/api/generate-verse-by-verse",
-                json=req.dict(),
-                headers={"Content-Type": "application/json"}
-            )
-            return response.json()
+        response = await http_pool.post(
+            "https://etude8-bible-api-production.up.railway.app/api/generate-verse-by-verse",
+            json=req.dict(),
+            headers={"Content-Type": "application/json"},
+            timeout=30
+        )
+        return response.json()
     except Exception as e:
         print(f"❌ Proxy error: {e}")
         raise HTTPException(status_code=500, detail=f"Proxy error: {str(e)}")
@@ -1003,13 +2104,13 @@ async def verse_proxy_to_railway(req: StudyRequest):
 async def study_proxy_to_railway(req: StudyRequest):
     """Proxy vers etude28-bible-api Railway pour éviter CORS"""
     try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            response = await client.post(
-                "https://etude28-bible-api-production.up.railway.app/api/generate-study",
-                json=req.dict(),
-                headers={"Content-Type": "application/json"}
-            )
-            return response.json()
+        response = await http_pool.post(
+            "https://etude28-bible-api-production.up.railway.app/api/generate-study",
+            json=req.dict(),
+            headers={"Content-Type": "application/json"},
+            timeout=30
+        )
+        return response.json()
     except Exception as e:
         print(f"❌ Proxy error: {e}")
         raise HTTPException(status_code=500, detail=f"Proxy error: {str(e)}")
@@ -1038,6 +2139,62 @@ if __name__ == "__main__":
     uvicorn.run("server:app", host="0.0.0.0", port=port, reload=True)
 
 # Routes dédiées Gemini Flash
+async def _stream_gemini_events(passage: str, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Événements SSE 'chunk' (texte déjà nettoyé) au fil de la génération, puis 'done' ou 'error'"""
+    started = time.perf_counter()
+    formatter = TheologicalContentFormatter()
+    first_chunk_ms: Optional[float] = None
+    characters = 0
+    try:
+        async for raw in chunks:
+            text = formatter.feed(raw)
+            if text:
+                if first_chunk_ms is None:
+                    first_chunk_ms = round((time.perf_counter() - started) * 1000, 1)
+                characters += len(text)
+                yield sse_event("chunk", {"text": text})
+        tail = formatter.flush()
+        if tail:
+            characters += len(tail)
+            yield sse_event("chunk", {"text": tail})
+    except Exception as e:
+        print(f"❌ Gemini stream failed for {passage}: {e}")
+        yield sse_event("error", {"status": 502, "detail": "Génération Gemini interrompue"})
+        return
+    yield sse_event("done", {
+        "passage": passage,
+        "characters": characters,
+        "first_chunk_ms": first_chunk_ms,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    })
+
+
+def _gemini_stream_response(request: StudyRequest, rubric_type: str) -> StreamingResponse:
+    passage = request.passage.strip()
+    if not passage:
+        raise HTTPException(status_code=400, detail="Passage requis")
+    if rubric_type == "thematic_study" and use_per_rubric_study(request.requestedRubriques):
+        print(f"🚀 Streaming rubric by rubric with Gemini Flash for {passage}")
+        chunks = stream_rubrics_with_gemini(passage, request.requestedRubriques)
+    else:
+        print(f"🚀 Streaming {rubric_type} with Gemini Flash for {passage}")
+        chunks = stream_enhanced_content_with_gemini(passage, rubric_type)
+    events = with_keepalive(_stream_gemini_events(passage, chunks), SSE_KEEPALIVE_SECONDS)
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@app.post("/api/generate-study-gemini/stream")
+async def generate_study_gemini_stream(request: StudyRequest):
+    """Comme /api/generate-study-gemini, en flux SSE : le texte arrive au rythme du modèle"""
+    return _gemini_stream_response(request, "thematic_study")
+
+
+@app.post("/api/generate-verse-by-verse-gemini/stream")
+async def generate_verse_by_verse_gemini_stream(request: StudyRequest):
+    """Comme /api/generate-verse-by-verse-gemini, en flux SSE : le texte arrive au rythme du modèle"""
+    return _gemini_stream_response(request, "verse_by_verse")
+
+
 @app.post("/api/generate-study-gemini")
 async def generate_study_gemini(request: StudyRequest):
     """Génère une étude biblique exclusivement avec Gemini Flash"""
@@ -1046,6 +2203,10 @@ async def generate_study_gemini(request: StudyRequest):
         if not passage:
             raise HTTPException(status_code=400, detail="Passage requis")
             
+        if use_per_rubric_study(request.requestedRubriques):
+            print("🚀 Generating rubric by rubric with Gemini Flash for " + passage)
+            return {"content": await generate_rubrics_with_gemini(passage, request.requestedRubriques)}
+
         print("🚀 Generating with Gemini Flash for " + passage)
         enhanced_content = await generate_enhanced_content_with_gemini(
             passage=passage,
@@ -1075,3 +2236,114 @@ async def generate_verse_by_verse_gemini(request: StudyRequest):
     except Exception as e:
         print("❌ Erreur generate_verse_by_verse_gemini: " + str(e))
         return {"content": "Erreur lors de la génération avec Gemini: " + str(e)}
+
+
+# =========================
+#   TRAVAUX ASYNCHRONES (études longues)
+# =========================
+# Une étude de chapitre complète peut dépasser les timeouts du front et des proxys :
+# POST /api/jobs renvoie un identifiant, GET /api/jobs/{id} la progression et le contenu.
+async def _run_verse_by_verse_job(job: Job) -> str:
+    book_label, osis, chap, verse = parse_passage_input(job.payload["passage"])
+    bible_id = await get_bible_id()
+    text = await fetch_passage_text(bible_id, osis, chap, verse)
+    verses = [(verse, text)] if verse else _split_numbered_verses(text)
+    title, intro = _verse_by_verse_heading(book_label, chap)
+    parts = [format_theological_content(f"**{title}**\n\n{intro}")]
+    job.report(done=0, total=len(verses), content=parts[0])
+
+    if verse:
+        explanations = _single_verse_explanation(text, book_label, chap, verse)
+    else:
+        explanations = iter_chapter_explanations(verses, book_label, chap)
+    texts = dict(verses)
+    async for vnum, theological_explanation in explanations:
+        parts.append(format_theological_content(_verse_block(vnum, texts[vnum], theological_explanation)))
+        job.report(done=len(parts) - 1, content="\n\n".join(parts))
+    return job.content
+
+
+async def _run_study_job(job: Job) -> str:
+    job.report(done=0, total=1)
+    response = await _compose_study(StudyRequest(**job.payload))
+    job.report(done=1)
+    return response.get("content", "")
+
+
+async def _run_study_gemini_job(job: Job) -> str:
+    requested = job.payload.get("requestedRubriques")
+    if not use_per_rubric_study(requested):
+        return await _gemini_job_runner("thematic_study")(job)
+    indices = requested_rubric_indices(requested)
+    sections: List[str] = []
+    job.report(done=0, total=len(indices))
+    async for _, section in iter_rubrics_with_gemini(job.payload["passage"], indices):
+        sections.append(section)
+        job.report(done=len(sections), content="\n\n".join(sections))
+    return job.content
+
+
+def _gemini_job_runner(rubric_type: str):
+    async def run(job: Job) -> str:
+        parts: List[str] = []
+        async for chunk in stream_enhanced_content_with_gemini(job.payload["passage"], rubric_type):
+            parts.append(chunk)
+            job.report(done=len(parts), content="".join(parts))
+        return "".join(parts)
+    return run
+
+
+job_queue = JobQueue(
+    workers=JOBS_WORKERS,
+    max_queue=JOBS_MAX_QUEUE,
+    ttl=JOBS_TTL,
+    store=SqliteJobStore(JOBS_STORE_PATH) if JOBS_PERSIST else None,
+)
+
+
+def _metered_job(kind: str, runner):
+    """Runner compté dans /api/metrics/llm sous 'job:<type>'"""
+    async def run(job: Job) -> str:
+        with llm_accounting.track(f"job:{kind}"):
+            return await runner(job)
+    return run
+
+
+job_queue.register("verse_by_verse", _metered_job("verse_by_verse", _run_verse_by_verse_job))
+job_queue.register("study", _metered_job("study", _run_study_job))
+job_queue.register("verse_by_verse_gemini", _metered_job("verse_by_verse_gemini", _gemini_job_runner("verse_by_verse")))
+job_queue.register("study_gemini", _metered_job("study_gemini", _run_study_gemini_job))
+
+
+@app.post("/api/jobs", status_code=202)
+async def create_job(request: JobRequest):
+    """Met une génération en file ; une requête identique déjà connue renvoie le même travail"""
+    passage = request.passage.strip()
+    if not passage:
+        raise HTTPException(status_code=400, detail="Passage requis")
+    if request.kind not in job_queue.kinds:
+        raise HTTPException(status_code=400, detail=f"Type inconnu: {request.kind}. Types: {', '.join(job_queue.kinds)}")
+    if request.kind in ("verse_by_verse", "study"):
+        parse_passage_input(passage)
+
+    payload: Dict[str, Any] = {"passage": passage}
+    if request.kind in ("study", "study_gemini"):
+        payload["requestedRubriques"] = request.requestedRubriques
+    if request.kind == "study" and request.use_gemini:
+        payload["use_gemini"] = True
+    try:
+        job, created = job_queue.submit(request.kind, payload)
+    except JobQueueFull:
+        raise HTTPException(status_code=503, detail="File de génération pleine, réessayez plus tard.")
+    if created:
+        print(f"📥 Job {job.kind} {job.id} queued for {passage}")
+    return {"id": job.id, "status": job.status, "deduplicated": not created, "poll": f"/api/jobs/{job.id}"}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Statut, progression (versets faits / total) et contenu partiel ou final d'un travail"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Travail inconnu ou expiré.")
+    return job.to_dict()
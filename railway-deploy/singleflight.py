@@ -0,0 +1,68 @@
+# Coalescence des requêtes identiques concurrentes ("single-flight")
+# Le premier appelant (leader) lance le travail ; les suivants attendent le même résultat.
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Déduplique les appels en vol par clé"""
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+
+        # Compteurs
+        self.leaders = 0
+        self.followers = 0
+        self.errors = 0
+        self.abandoned = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Exécute fn() une seule fois pour tous les appels concurrents de même clé.
+        - une exception du leader est propagée à tous les appelants
+        - un appelant annulé n'annule pas le travail des autres ; le travail n'est annulé
+          que lorsque plus personne ne l'attend
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda t, k=key: self._finished(k, t))
+        else:
+            self.followers += 1
+
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if task.done():
+                raise
+            # Cet appelant abandonne ; si c'était le dernier, on arrête le travail
+            if self._waiters.get(key, 0) <= 1:
+                self.abandoned += 1
+                task.cancel()
+            raise
+        finally:
+            if key in self._waiters and self._inflight.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            self._waiters.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "errors": self.errors,
+            "abandoned": self.abandoned,
+        }
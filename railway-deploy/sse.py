@@ -0,0 +1,50 @@
+# Server-Sent Events : encodage des événements et maintien de la connexion
+# La réponse est tirée par le client (StreamingResponse attend l'écriture de chaque morceau) :
+# un client lent ralentit la production au lieu de la faire s'accumuler en mémoire.
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # pas de mise en tampon côté proxy (nginx, Railway)
+}
+
+
+def sse_event(event: str, data: Dict[str, Any], event_id: Optional[str] = None) -> str:
+    """Un événement SSE complet (données JSON sur une ligne)"""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def with_keepalive(events: AsyncIterator[str], interval: float = 15.0) -> AsyncIterator[str]:
+    """
+    Relaie `events` en intercalant un commentaire ': ping' quand aucun événement n'arrive
+    pendant `interval` secondes (évite la coupure des connexions inactives par les proxys).
+    Le générateur source n'avance que lorsque l'événement précédent a été écrit.
+    """
+    source = events.__aiter__()
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(source.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=interval)
+            if not done:
+                yield ": ping\n\n"
+                continue
+            try:
+                event = pending.result()
+            except StopAsyncIteration:
+                return
+            pending = None
+            yield event
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        aclose = getattr(source, "aclose", None)
+        if aclose is not None:
+            await aclose()